@@ -1,144 +1,163 @@
 import os
+import time
 import streamlit as st
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
-import speech_recognition as sr
-from concurrent.futures import ThreadPoolExecutor
-import yt_dlp as youtube_dl
-from moviepy.editor import VideoFileClip
-from transformers import BartTokenizer, BartForConditionalGeneration
+from models import BART_BACKENDS, DEFAULT_BART_BACKEND, available_bart_backends, registry
+from scheduler import SchedulerStats
+from cache import media_digest
+from workspace import Workspace
+from jobs import JobQueue, DONE, FAILED
+from bart_summarizer import DECODING
+from audio_pipeline import (DEFAULT_DECODING, cached_summary, cached_transcription, progressive_transcription,
+                            transcribe_source, url_source_id)
+from ingest import copy_upload
+from profiler import show_debug_panel, trace
 
-# Function to load audio file
-def load_audio(file_path):
-    return AudioSegment.from_wav(file_path)
+# Where uploads are kept for background jobs until a worker has processed them
+UPLOADS_DIR = os.path.join(".cache", "uploads")
+# Seconds between two polls of a background job's status
+JOB_POLL_INTERVAL = 2
 
+# Function to display the transcription and its summary
+def show_results(transcription, summarized_text):
+    st.subheader("Full Transcription")
+    st.text_area("Transcription", transcription, height=200)
+    st.subheader("Summarized Text")
+    st.text_area("Summary", summarized_text, height=100)
 
-# Function to remove silence
-def remove_silence(audio_segment, silence_thresh=-40, min_silence_len=500):
-    chunks = split_on_silence(audio_segment, min_silence_len=min_silence_len, silence_thresh=silence_thresh)
-    return chunks
+# Function to transcribe a source while the transcript and a rolling summary are shown as
+# they grow; the final results replace them once the whole video is done
+def show_progressive_results(source, source_id, is_url, workspace):
+    transcription = cached_transcription(source_id, streaming)
+    if transcription is None:
+        transcript_box, summary_box = st.empty(), st.empty()
+        for transcription, summary in progressive_transcription(source, source_id, is_url, workspace,
+                                                                streaming=streaming, concurrency=concurrency,
+                                                                stats=recognition_stats, backend=bart_backend,
+                                                                decoding=decoding):
+            with transcript_box.container():
+                st.subheader("Transcription (in progress)")
+                st.text(transcription)
+            with summary_box.container():
+                st.subheader("Summary so far")
+                st.write(summary or "The summary appears once enough speech has been recognized.")
+        transcript_box.empty()
+        summary_box.empty()
+    if transcription:
+        show_results(transcription, cached_summary(transcription, backend=bart_backend, decoding=decoding,
+                                                   strategy="rolling"))
+    return transcription
 
-# Function to combine chunks into one audio segment
-def combine_audio_chunks(chunks):
-    combined = AudioSegment.empty()
-    for chunk in chunks:
-        combined += chunk
-    return combined
+# Function to queue a video job for the background workers and remember it in the URL,
+# so a refreshed page picks the job up again
+def submit_job(payload):
+    payload.update(streaming=streaming, concurrency=concurrency, bart_backend=bart_backend, decoding=decoding)
+    st.query_params["job"] = JobQueue().submit("video", payload)
 
-# Function to recognize speech in the audio file
-def transcribe_audio(path):
-    r = sr.Recognizer()
-    with sr.AudioFile(path) as source:
-        audio_listened = r.record(source)
-        try:
-            text = r.recognize_google(audio_listened)
-            return text.capitalize()
-        except sr.UnknownValueError:
-            return ""
-
-# Function that splits the audio file into chunks on silence and applies speech recognition
-def get_large_audio_transcription_on_silence(path):
-    sound = AudioSegment.from_file(path)
-    chunks = split_on_silence(sound, min_silence_len=500, silence_thresh=sound.dBFS - 14, keep_silence=500)
-    folder_name = "audio_chunks"
-    if not os.path.isdir(folder_name):
-        os.mkdir(folder_name)
-    
-    whole_text = ""
-    
-    def process_chunk(i, audio_chunk):
-        chunk_filename = os.path.join(folder_name, f"chunk{i}.wav")
-        audio_chunk.export(chunk_filename, format="wav")
-        text = transcribe_audio(chunk_filename)
-        os.remove(chunk_filename)  # Clean up chunk file after processing
-        return text
-    
-    with ThreadPoolExecutor() as executor:
-        results = list(executor.map(lambda idx_chunk: process_chunk(*idx_chunk), enumerate(chunks, start=1)))
-        whole_text = " ".join(filter(None, results))  # Join non-empty strings
-
-    # Clean up chunk directory
-    for file in os.listdir(folder_name):
-        os.remove(os.path.join(folder_name, file))
-    os.rmdir(folder_name)
-    
-    return whole_text
-
-# Function to download a YouTube video and extract audio
-def download_and_extract_audio(video_url, audio_filename):
-    ydl_opts = {
-        'format': 'best',
-        'outtmpl': 'downloaded_video.mp4'
-    }
-
-    with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-        ydl.download([video_url])
-        
-    video_clip = VideoFileClip('downloaded_video.mp4')
-    audio = video_clip.audio
-    audio.write_audiofile(audio_filename, codec='pcm_s16le')
-    audio.close()
-    video_clip.close()
-    os.remove('downloaded_video.mp4')
-
-# Function to extract audio from a video file
-def extract_audio_from_video(video_file, audio_filename):
-    video_clip = VideoFileClip(video_file)
-    audio = video_clip.audio
-    audio.write_audiofile(audio_filename, codec='pcm_s16le')
-    audio.close()
-    video_clip.close()
-
-# Function to summarize text using DistilBART
-def summarize_with_distilbart(text, max_length=150, min_length=50):
-    tokenizer = BartTokenizer.from_pretrained("sshleifer/distilbart-cnn-12-6")
-    model = BartForConditionalGeneration.from_pretrained("sshleifer/distilbart-cnn-12-6")
-    inputs = tokenizer.encode("summarize: " + text, return_tensors="pt", max_length=1024, truncation=True)
-    summary_ids = model.generate(inputs, max_length=max_length, min_length=min_length, length_penalty=2.0, num_beams=4, early_stopping=True)
-    summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-    return summary
+# Function to show the status of a background job, polling until it has finished
+def show_job_status(job_id):
+    job = JobQueue().get(job_id)
+    if job is None:
+        st.warning(f"Unknown job '{job_id}'.")
+    elif job["status"] == DONE:
+        show_results(job["result"]["transcription"], job["result"]["summary"])
+    elif job["status"] == FAILED:
+        st.error(job["error"])
+    else:
+        st.progress(job["progress"], text=f"Job {job_id[:8]}: {job['stage']}...")
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
 
 # Main Streamlit app
 st.title("Video to Summary")
 
 input_type = st.radio("Choose input type:", ('YouTube URL', 'Local video file'))
 
-audio_filename = 'extracted_audio.wav'
+# The ONNX backend is only offered when optimum is installed
+bart_backends = available_bart_backends()
+bart_backend = st.sidebar.selectbox("Summarization backend", bart_backends,
+                                    index=bart_backends.index(DEFAULT_BART_BACKEND)
+                                    if DEFAULT_BART_BACKEND in bart_backends else 0,
+                                    help="int8 and onnx are faster on CPU, with slightly different summaries")
+decoding = st.sidebar.selectbox("Decoding", list(DECODING), index=list(DECODING).index(DEFAULT_DECODING),
+                                help="greedy is several times faster than beam search")
+# Load the summarization model once per process, before the first request
+with st.spinner("Loading models..."):
+    try:
+        registry.warm_up([BART_BACKENDS[bart_backend]])
+    except (ImportError, OSError) as e:
+        st.error(f"Could not load the '{bart_backend}' summarization backend: {e}")
+        st.stop()
+
+streaming = st.sidebar.checkbox("Streaming transcription (low memory, no temp files)", value=True)
+concurrency = st.sidebar.number_input("Parallel recognition requests", min_value=1, max_value=32, value=4)
+progressive = st.sidebar.checkbox("Show the transcript and summary while recognizing", value=True)
+run_in_background = st.sidebar.checkbox("Run in background worker (keeps running if the page is refreshed)")
+show_profile = st.sidebar.checkbox("Show profiling panel")
+recognition_stats = SchedulerStats()
 
 if input_type == 'YouTube URL':
     video_url = st.text_input("Enter the YouTube video URL:")
     if st.button("Process YouTube Video"):
-        if video_url:
-            with st.spinner("Downloading and processing video..."):
-                download_and_extract_audio(video_url, audio_filename)
-                transcription = get_large_audio_transcription_on_silence(audio_filename)
-                if transcription:
-                    st.subheader("Full Transcription")
-                    st.text_area("Transcription", transcription, height=200)
-                    summarized_text = summarize_with_distilbart(transcription)
-                    st.subheader("Summarized Text")
-                    st.text_area("Summary", summarized_text, height=100)
+        if video_url and run_in_background:
+            submit_job({"url": video_url})
+        elif video_url:
+            with st.spinner("Downloading and processing video..."), Workspace() as workspace, \
+                    trace("youtube_url") as request_trace:
+                st.session_state["trace"] = request_trace
+                if progressive:
+                    transcription = show_progressive_results(video_url, url_source_id(video_url), True, workspace)
                 else:
+                    transcription = transcribe_source(video_url, url_source_id(video_url), True, workspace,
+                                                      streaming=streaming, concurrency=concurrency,
+                                                      stats=recognition_stats)
+                    if transcription:
+                        show_results(transcription, cached_summary(transcription, backend=bart_backend,
+                                                                   decoding=decoding))
+                if not transcription:
                     st.error("Failed to fetch transcript or transcript is empty.")
-                os.remove(audio_filename)
         else:
             st.error("Please enter a valid YouTube URL.")
 elif input_type == 'Local video file':
     uploaded_file = st.file_uploader("Choose a video file", type=["mp4", "avi", "mov", "mkv"])
     if uploaded_file is not None:
-        with st.spinner("Processing video..."):
-            video_file_path = os.path.join("temp_video." + uploaded_file.name.split('.')[-1])
-            with open(video_file_path, "wb") as f:
-                f.write(uploaded_file.read())
-            extract_audio_from_video(video_file_path, audio_filename)
-            transcription = get_large_audio_transcription_on_silence(audio_filename)
-            if transcription:
-                st.subheader("Full Transcription")
-                st.text_area("Transcription", transcription, height=200)
-                summarized_text = summarize_with_distilbart(transcription)
-                st.subheader("Summarized Text")
-                st.text_area("Summary", summarized_text, height=100)
-            else:
-                st.error("Failed to fetch transcript or transcript is empty.")
-            os.remove(audio_filename)
-            os.remove(video_file_path)
\ No newline at end of file
+        # Hash each upload once; the script reruns on every interaction and every job poll
+        if st.session_state.get("upload_file_id") != uploaded_file.file_id:
+            st.session_state["upload_digest"] = media_digest(uploaded_file)
+            st.session_state["upload_file_id"] = uploaded_file.file_id
+        digest = st.session_state["upload_digest"]
+        extension = uploaded_file.name.split('.')[-1]
+        if run_in_background:
+            # The uploader reruns the script on every interaction; submit each upload only once
+            if st.session_state.get("submitted_upload") != digest:
+                os.makedirs(UPLOADS_DIR, exist_ok=True)
+                upload_path = os.path.join(UPLOADS_DIR, f"{digest}.{extension}")
+                copy_upload(uploaded_file, upload_path)
+                submit_job({"path": upload_path, "digest": digest, "delete_after": True})
+                st.session_state["submitted_upload"] = digest
+        else:
+            # The upload is streamed to disk and to ffmpeg in fixed-size blocks, never read whole
+            with st.spinner("Processing video..."), Workspace() as workspace, \
+                    trace("local_video") as request_trace:
+                st.session_state["trace"] = request_trace
+                if progressive:
+                    transcription = show_progressive_results(uploaded_file, digest, False, workspace)
+                else:
+                    transcription = transcribe_source(uploaded_file, digest, False, workspace,
+                                                      streaming=streaming, concurrency=concurrency,
+                                                      stats=recognition_stats)
+                    if transcription:
+                        show_results(transcription, cached_summary(transcription, backend=bart_backend,
+                                                                   decoding=decoding))
+                if not transcription:
+                    st.error("Failed to fetch transcript or transcript is empty.")
+
+if "job" in st.query_params:
+    show_job_status(st.query_params["job"])
+
+# Recognition scheduler counters of the last run, for tuning the concurrency
+if recognition_stats.started_at is not None:
+    with st.sidebar.expander("Recognition stats"):
+        st.json(recognition_stats.as_dict())
+
+if show_profile:
+    show_debug_panel(st.session_state.get("trace"))
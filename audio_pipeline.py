@@ -0,0 +1,337 @@
+import contextvars
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pydub import AudioSegment
+from silence import split_on_silence
+import speech_recognition as sr
+from models import BART_BACKENDS, DEFAULT_BART_BACKEND, registry
+from ingest import (copy_upload, decode_to_pcm_wav, decode_upload_to_pcm_wav, download_audio_as_pcm,
+                    download_audio_only)
+from audio_stream import iter_audio_chunks
+from scheduler import RecognitionScheduler
+from bart_summarizer import RollingSummarizer, summarize_map_reduce
+from cache import get_cache, make_key, media_digest, video_id_from_url
+from workspace import Workspace, load_pcm_segment
+from profiler import instrument, span
+
+# Function to load audio file
+def load_audio(file_path):
+    return AudioSegment.from_wav(file_path)
+
+
+# Function to remove silence
+def remove_silence(audio_segment, silence_thresh=-40, min_silence_len=500):
+    chunks = split_on_silence(audio_segment, min_silence_len=min_silence_len, silence_thresh=silence_thresh)
+    return chunks
+
+# Function to combine chunks into one audio segment
+def combine_audio_chunks(chunks):
+    combined = AudioSegment.empty()
+    for chunk in chunks:
+        combined += chunk
+    return combined
+
+# Seconds before a single recognition request is abandoned (and retried)
+RECOGNITION_TIMEOUT = 30
+# "google" sends the audio to the Google Web Speech API; "stub" answers locally after
+# STUB_RECOGNITION_LATENCY seconds with deterministic text (offline benchmarks)
+RECOGNITION_BACKEND = os.getenv("RECOGNITION_BACKEND", "google")
+STUB_RECOGNITION_LATENCY = float(os.getenv("STUB_RECOGNITION_LATENCY", "0.05"))
+STUB_WORDS = ("the speaker explains how the model uses data to reach an important result "
+              "and then shows another example of the method in practice").split()
+
+# Function to answer like a recognizer without a network: about 2.5 words per second of audio
+def stub_recognize(audio_data):
+    seconds = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+    time.sleep(STUB_RECOGNITION_LATENCY)
+    count = max(1, int(seconds * 2.5))
+    first = len(audio_data.frame_data) % len(STUB_WORDS)
+    return " ".join(STUB_WORDS[(first + i) % len(STUB_WORDS)] for i in range(count))
+
+# Function to recognize speech with the configured backend
+def recognize(recognizer, audio_data):
+    if RECOGNITION_BACKEND == "stub":
+        return stub_recognize(audio_data)
+    return recognizer.recognize_google(audio_data)
+
+# Function to recognize speech in the audio file
+def transcribe_audio(path):
+    r = sr.Recognizer()
+    r.operation_timeout = RECOGNITION_TIMEOUT
+    with sr.AudioFile(path) as source:
+        audio_listened = r.record(source)
+        with span("recognize", bytes=len(audio_listened.frame_data),
+                  audio_seconds=len(audio_listened.frame_data) / (audio_listened.sample_rate *
+                                                                  audio_listened.sample_width)):
+            try:
+                text = recognize(r, audio_listened)
+                return text.capitalize()
+            except sr.UnknownValueError:
+                return ""
+
+# Function to recognize speech in an in-memory audio segment (no temp file round trip)
+def transcribe_audio_segment(audio_segment):
+    r = sr.Recognizer()
+    r.operation_timeout = RECOGNITION_TIMEOUT
+    audio_data = sr.AudioData(audio_segment.raw_data, audio_segment.frame_rate, audio_segment.sample_width)
+    with span("recognize", bytes=len(audio_segment.raw_data), audio_seconds=len(audio_segment) / 1000):
+        try:
+            text = recognize(r, audio_data)
+            return text.capitalize()
+        except sr.UnknownValueError:
+            return ""
+
+# Function that decodes the file incrementally and transcribes its silence-split chunks in memory.
+# The scheduler pulls chunks lazily, so only the chunks being recognized are held in memory.
+# Yields the text of every non-empty chunk, in order, as soon as it is recognized.
+def iter_large_audio_transcription_streaming(path, concurrency=None, stats=None):
+    scheduler = RecognitionScheduler(transcribe_audio_segment, backend="google", concurrency=concurrency,
+                                     timeout=RECOGNITION_TIMEOUT, stats=stats)
+    chunks = iter_audio_chunks(path, min_silence_len=500, silence_offset=-14, keep_silence=500)
+    for _, text in scheduler.run(chunks):
+        if text:
+            yield text
+
+# Function that decodes the file incrementally and transcribes its silence-split chunks in memory
+def get_large_audio_transcription_streaming(path, concurrency=None, stats=None):
+    return " ".join(iter_large_audio_transcription_streaming(path, concurrency=concurrency, stats=stats))
+
+# Function that splits the audio file into chunks on silence and applies speech recognition,
+# yielding the text of every non-empty chunk in order as soon as it is recognized
+def iter_large_audio_transcription(path, streaming=False, concurrency=None, stats=None, workspace=None):
+    if streaming:
+        yield from iter_large_audio_transcription_streaming(path, concurrency=concurrency, stats=stats)
+        return
+    # Extracted PCM is memory-mapped rather than read into the Python heap
+    try:
+        sound = load_pcm_segment(path)
+    except ValueError:
+        sound = AudioSegment.from_file(path)
+    with span("split_on_silence", bytes=len(sound.raw_data), audio_seconds=len(sound) / 1000):
+        chunks = split_on_silence(sound, min_silence_len=500, silence_thresh=sound.dBFS - 14, keep_silence=500)
+    own_workspace = workspace is None
+    workspace = workspace or Workspace()
+    folder_name = workspace.directory("audio_chunks")
+    
+    def process_chunk(idx_chunk):
+        i, audio_chunk = idx_chunk
+        chunk_filename = os.path.join(folder_name, f"chunk{i}.wav")
+        audio_chunk.export(chunk_filename, format="wav")
+        try:
+            return transcribe_audio(chunk_filename)
+        finally:
+            os.remove(chunk_filename)  # Clean up chunk file after processing
+    
+    scheduler = RecognitionScheduler(process_chunk, backend="google", concurrency=concurrency,
+                                     timeout=RECOGNITION_TIMEOUT, stats=stats)
+    try:
+        for _, text in scheduler.run(enumerate(chunks, start=1)):
+            if text:
+                yield text
+    finally:
+        # Clean up chunk directory
+        if own_workspace:
+            workspace.cleanup()
+        else:
+            shutil.rmtree(folder_name, ignore_errors=True)
+
+# Function that splits the audio file into chunks on silence and applies speech recognition
+def get_large_audio_transcription_on_silence(path, streaming=False, concurrency=None, stats=None, workspace=None):
+    return " ".join(iter_large_audio_transcription(path, streaming=streaming, concurrency=concurrency,
+                                                   stats=stats, workspace=workspace))  # Join non-empty strings
+
+# Function to download a YouTube video's audio track and extract it as 16 kHz mono PCM.
+# Only the smallest audio-only format is fetched; the video is never downloaded.
+def download_and_extract_audio(video_url, audio_filename):
+    download_audio_as_pcm(video_url, audio_filename, output_dir=os.path.dirname(audio_filename) or ".")
+
+# Function to extract audio from a video file as 16 kHz mono PCM (video frames are not decoded)
+def extract_audio_from_video(video_file, audio_filename):
+    decode_to_pcm_wav(video_file, audio_filename)
+
+# Function to check that an uploaded file object fits in the workspace quota and get the
+# path its copy is written to (keeping the file's extension for ffmpeg)
+def upload_copy_path(uploaded_file, workspace):
+    size = getattr(uploaded_file, "size", None)
+    if size is None:
+        size = uploaded_file.seek(0, os.SEEK_END)
+    workspace.check_quota(extra=size)
+    name = getattr(uploaded_file, "name", "") or ""
+    extension = name.rsplit(".", 1)[-1] if "." in name else "bin"
+    return workspace.file("temp_video." + extension)
+
+# Function to extract the audio of an uploaded file object: the upload is copied into the
+# workspace in fixed-size blocks and piped to ffmpeg at the same time, never read whole
+def extract_audio_from_upload(uploaded_file, audio_filename, workspace):
+    copy_path = upload_copy_path(uploaded_file, workspace)
+    try:
+        decode_upload_to_pcm_wav(uploaded_file, audio_filename, copy_path)
+    finally:
+        if os.path.exists(copy_path):
+            os.remove(copy_path)
+
+DEFAULT_DECODING = os.getenv("BART_DECODING", "beam")
+
+# Function to summarize text using DistilBART; transcripts longer than one 1024-token
+# input are summarized window by window and the partial summaries are merged (map-reduce)
+@instrument("bart.generate", measure=lambda summary, text, *args, **kwargs: {"bytes": len(text.encode("utf-8"))})
+def summarize_with_distilbart(text, max_length=150, min_length=50, backend=None, decoding=None):
+    tokenizer, model = registry.get(BART_BACKENDS[backend or DEFAULT_BART_BACKEND])
+    return summarize_map_reduce(text, tokenizer, model, max_length=max_length, min_length=min_length,
+                                decoding=decoding or DEFAULT_DECODING)
+
+# Function to build the cache key of a transcription for a video ID or media hash. The
+# recognition backend is part of the key, so stub transcripts never answer real requests.
+def transcription_key(source_id, streaming):
+    return make_key(source_id, "transcript", recognizer=RECOGNITION_BACKEND, min_silence_len=500,
+                    silence_offset=-14, keep_silence=500, streaming=streaming)
+
+# Function to get a cached transcription for a video ID or media hash (None if there is none)
+def cached_transcription(source_id, streaming):
+    return get_cache().get(transcription_key(source_id, streaming))
+
+# Function to create a rolling summarizer that follows a transcript while it is recognized
+def rolling_summarizer(max_length=150, min_length=50, backend=None, decoding=None):
+    tokenizer, model = registry.get(BART_BACKENDS[backend or DEFAULT_BART_BACKEND])
+    return RollingSummarizer(tokenizer, model, max_length=max_length, min_length=min_length,
+                             decoding=decoding or DEFAULT_DECODING)
+
+# Function to summarize a whole transcription the way the progressive display does
+def summarize_rolling(text, max_length=150, min_length=50, backend=None, decoding=None):
+    summarizer = rolling_summarizer(max_length, min_length, backend, decoding)
+    summarizer.add(text)
+    return summarizer.finish()
+
+# Function to build the cache key of a summary ("map-reduce" or "rolling" strategy)
+def summary_key(transcription, max_length=150, min_length=50, backend=None, decoding=None, strategy="map-reduce"):
+    return make_key(media_digest(transcription.encode("utf-8")), "summary",
+                    model=BART_BACKENDS[backend or DEFAULT_BART_BACKEND], strategy=strategy,
+                    decoding=decoding or DEFAULT_DECODING, max_length=max_length, min_length=min_length)
+
+# Function to summarize a transcription, reusing a cached summary of the same text
+def cached_summary(transcription, max_length=150, min_length=50, backend=None, decoding=None,
+                   strategy="map-reduce"):
+    summarize = summarize_rolling if strategy == "rolling" else summarize_with_distilbart
+    key = summary_key(transcription, max_length, min_length, backend, decoding, strategy)
+    return get_cache().get_or_compute(key, lambda: summarize(transcription, max_length, min_length,
+                                                             backend, decoding))
+
+# Function to get the media file the streaming decoder reads: the downloaded audio-only track
+# of a URL, a block-by-block copy of an upload, or the local file itself
+def media_for_streaming(source, is_url, workspace):
+    if is_url:
+        return download_audio_only(source, output_dir=workspace.path)
+    if hasattr(source, "read"):
+        copy_path = upload_copy_path(source, workspace)
+        copy_upload(source, copy_path)
+        return copy_path
+    return source
+
+# Function to transcribe a YouTube URL, a local video file or an uploaded file object,
+# yielding the text of each chunk as soon as it is recognized (a cached transcription is
+# yielded whole). The cache is
+# checked before anything is downloaded or decoded; all intermediate files live in the given
+# scratch workspace, so concurrent requests never share a filename.
+def iter_source_transcription(source, source_id, is_url, workspace, streaming=True, concurrency=None,
+                              stats=None, progress=None):
+    progress = progress or (lambda stage, fraction: None)
+    transcription = cached_transcription(source_id, streaming)
+    if transcription is not None:
+        if transcription:
+            yield transcription
+        return
+
+    progress("download" if is_url else "extract", 0.1)
+    if streaming:
+        # The media itself is decoded incrementally while it is recognized; no WAV is written
+        audio_filename = media_for_streaming(source, is_url, workspace)
+    else:
+        audio_filename = workspace.file("extracted_audio.wav")
+        if is_url:
+            download_and_extract_audio(source, audio_filename)
+        elif hasattr(source, "read"):
+            extract_audio_from_upload(source, audio_filename, workspace)
+        else:
+            extract_audio_from_video(source, audio_filename)
+    workspace.check_quota()
+    try:
+        progress("transcribe", 0.3)
+        audio_bytes = os.path.getsize(audio_filename)
+        # 16 kHz mono 16-bit PCM: 32000 bytes per second of audio (unknown for streamed media)
+        pieces = []
+        with span("transcribe", bytes=audio_bytes, audio_seconds=0.0 if streaming else audio_bytes / 32000):
+            for text in iter_large_audio_transcription(audio_filename, streaming=streaming,
+                                                       concurrency=concurrency, stats=stats, workspace=workspace):
+                pieces.append(text)
+                # Also a heartbeat, so a background job's long transcription is never taken as stale
+                progress(f"transcribe ({len(pieces)} chunks)", 0.3)
+                yield text
+    finally:
+        if audio_filename != source:  # a local source file is the caller's
+            os.remove(audio_filename)
+    if pieces:
+        get_cache().set(transcription_key(source_id, streaming), " ".join(pieces))
+
+# Function to transcribe a YouTube URL or a local video file, reusing a cached transcription
+def transcribe_source(source, source_id, is_url, workspace, streaming=True, concurrency=None,
+                      stats=None, progress=None):
+    return " ".join(iter_source_transcription(source, source_id, is_url, workspace, streaming=streaming,
+                                              concurrency=concurrency, stats=stats, progress=progress))
+
+# Function to transcribe a source progressively for display: yields (transcript so far,
+# rolling summary so far) after every recognized chunk, so the first text shows up long
+# before the video is fully transcribed. The summary is only updated from the new text, on
+# a worker thread so recognition keeps going during the updates; the last pair holds the
+# full transcript and its final summary (cached like cached_summary(..., strategy="rolling")).
+def progressive_transcription(source, source_id, is_url, workspace, streaming=True, concurrency=None,
+                              stats=None, max_length=150, min_length=50, backend=None, decoding=None):
+    summarizer = rolling_summarizer(max_length, min_length, backend, decoding)
+    # One worker, so the updates are applied in transcript order
+    executor = ThreadPoolExecutor(max_workers=1)
+    updates = []
+    pieces = []
+    try:
+        for text in iter_source_transcription(source, source_id, is_url, workspace, streaming=streaming,
+                                              concurrency=concurrency, stats=stats):
+            pieces.append(text)
+            updates.append(executor.submit(contextvars.copy_context().run, summarizer.add, text))
+            yield " ".join(pieces), summarizer.summary
+        transcription = " ".join(pieces)
+        if not transcription:
+            return
+        for update in updates:
+            update.result()  # Re-raise an error of an update
+        summary = executor.submit(contextvars.copy_context().run, summarizer.finish).result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    get_cache().set(summary_key(transcription, max_length, min_length, backend, decoding, "rolling"), summary)
+    yield transcription, summary
+
+# Function to get the cache source ID of a YouTube URL (its video ID when it has one)
+def url_source_id(video_url):
+    return video_id_from_url(video_url) or media_digest(video_url.encode("utf-8"))
+
+# Function to run a whole video job (transcribe + summarize) outside of Streamlit.
+# payload: {"url": ...} or {"path": ...}, plus optional "streaming", "concurrency",
+# "bart_backend" and "decoding".
+def run_video_job(payload, progress=None):
+    progress = progress or (lambda stage, fraction: None)
+    is_url = "url" in payload
+    source = payload["url"] if is_url else payload["path"]
+    source_id = url_source_id(source) if is_url else payload.get("digest") or media_digest(source)
+    try:
+        with Workspace(prefix="job-") as workspace:
+            transcription = transcribe_source(source, source_id, is_url, workspace,
+                                              streaming=payload.get("streaming", True),
+                                              concurrency=payload.get("concurrency"), progress=progress)
+    finally:
+        if payload.get("delete_after") and not is_url and os.path.exists(source):
+            os.remove(source)
+    if not transcription:
+        raise RuntimeError("Failed to fetch transcript or transcript is empty.")
+    progress("summarize", 0.8)
+    summary = cached_summary(transcription, backend=payload.get("bart_backend"), decoding=payload.get("decoding"))
+    progress("done", 1.0)
+    return {"transcription": transcription, "summary": summary}
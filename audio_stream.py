@@ -0,0 +1,130 @@
+import math
+import subprocess
+from pydub import AudioSegment
+from silence import detect_nonsilent
+
+# Recognizers work on 16 kHz mono 16-bit PCM, so that is what the decoder produces
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+
+# How much audio (in ms) to decode before looking for silence boundaries
+DEFAULT_WINDOW_MS = 30000
+# Longest chunk that is held back while waiting for a silence (in ms)
+DEFAULT_MAX_CHUNK_MS = 60000
+
+
+# Function to decode an audio/video file incrementally into raw PCM blocks with ffmpeg
+def iter_pcm_blocks(path, block_ms=1000, sample_rate=SAMPLE_RATE):
+    command = [
+        AudioSegment.converter, "-nostdin", "-loglevel", "error",
+        "-i", path,
+        "-vn", "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ac", str(CHANNELS), "-ar", str(sample_rate),
+        "-",
+    ]
+    block_size = int(sample_rate * block_ms / 1000) * SAMPLE_WIDTH * CHANNELS
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            block = process.stdout.read(block_size)
+            if not block:
+                break
+            yield block
+        process.stdout.close()
+        if process.wait() != 0:
+            error = process.stderr.read().decode(errors="replace").strip()
+            raise RuntimeError(f"ffmpeg failed to decode {path}: {error}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+# Function to wrap raw PCM bytes as an AudioSegment without touching the disk
+def pcm_to_segment(raw, sample_rate=SAMPLE_RATE):
+    return AudioSegment(data=raw, sample_width=SAMPLE_WIDTH, frame_rate=sample_rate, channels=CHANNELS)
+
+
+# Function to pad nonsilent ranges like pydub's split_on_silence does
+def pad_ranges(ranges, keep_silence):
+    output_ranges = [[start - keep_silence, end + keep_silence] for start, end in ranges]
+    for range_i, range_ii in zip(output_ranges, output_ranges[1:]):
+        last_end = range_i[1]
+        next_start = range_ii[0]
+        if next_start < last_end:
+            range_i[1] = (last_end + next_start) // 2
+            range_ii[0] = range_i[1]
+    return output_ranges
+
+
+# Function to measure the loudness (dBFS) of raw 16-bit PCM from its sum of squares
+def sum_squares_to_dbfs(sum_squares, sample_count, max_amplitude):
+    if not sample_count or not sum_squares:
+        return -float("inf")
+    return 20 * math.log10(math.sqrt(sum_squares / sample_count) / max_amplitude)
+
+
+# Function that splits a stream of PCM blocks on silence and yields the chunks as they close.
+# Only the audio after the last closed chunk is buffered, so memory stays bounded no matter
+# how long the input is. The silence threshold follows the loudness of the audio seen so far
+# (offset by silence_offset dB), which approximates `sound.dBFS - 14` on the whole file.
+def stream_split_on_silence(blocks, min_silence_len=500, silence_offset=-14, keep_silence=500,
+                            sample_rate=SAMPLE_RATE, window_ms=DEFAULT_WINDOW_MS,
+                            max_chunk_ms=DEFAULT_MAX_CHUNK_MS):
+    buffer = pcm_to_segment(b"", sample_rate)
+    max_amplitude = buffer.max_possible_amplitude
+    pending = []
+    pending_ms = 0
+    sum_squares = 0
+    sample_count = 0
+
+    def split(buffer, final):
+        silence_thresh = sum_squares_to_dbfs(sum_squares, sample_count, max_amplitude) + silence_offset
+        ranges = detect_nonsilent(buffer, min_silence_len=min_silence_len, silence_thresh=silence_thresh)
+        if not ranges:
+            # All silence: keep just enough for the padding of the next chunk
+            return [], buffer[max(len(buffer) - keep_silence, 0):]
+        output_ranges = pad_ranges(ranges, keep_silence)
+        if final:
+            closed, rest = output_ranges, len(buffer)
+        elif len(buffer) - ranges[-1][1] >= 2 * keep_silence + min_silence_len:
+            # The last chunk is followed by enough silence that its padding is final
+            closed, rest = output_ranges, ranges[-1][1] + keep_silence
+        else:
+            # The last chunk may continue in the next window, keep it buffered
+            closed, rest = output_ranges[:-1], max(output_ranges[-1][0], 0)
+        chunks = [buffer[max(start, 0):min(end, len(buffer))] for start, end in closed]
+        return chunks, buffer[rest:]
+
+    for block in blocks:
+        block_segment = pcm_to_segment(block, sample_rate)
+        sum_squares += block_segment.rms ** 2 * block_segment.frame_count()
+        sample_count += int(block_segment.frame_count())
+        pending.append(block)
+        pending_ms += len(block_segment)
+        if pending_ms < window_ms:
+            continue
+
+        buffer += pcm_to_segment(b"".join(pending), sample_rate)
+        pending, pending_ms = [], 0
+        chunks, buffer = split(buffer, final=False)
+        yield from chunks
+
+        # Continuous speech without any silence: cut it so the buffer cannot grow forever
+        while len(buffer) > max_chunk_ms:
+            yield buffer[:max_chunk_ms]
+            buffer = buffer[max_chunk_ms:]
+
+    if pending:
+        buffer += pcm_to_segment(b"".join(pending), sample_rate)
+    if len(buffer):
+        chunks, _ = split(buffer, final=True)
+        yield from chunks
+
+
+# Function to decode a file and yield its silence-split chunks as in-memory AudioSegments
+def iter_audio_chunks(path, min_silence_len=500, silence_offset=-14, keep_silence=500):
+    blocks = iter_pcm_blocks(path)
+    return stream_split_on_silence(blocks, min_silence_len=min_silence_len,
+                                   silence_offset=silence_offset, keep_silence=keep_silence)
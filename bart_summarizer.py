@@ -0,0 +1,158 @@
+from profiler import span
+
+# BART accepts at most 1024 positions, including the <s> and </s> special tokens
+MAX_INPUT_TOKENS = 1024
+DEFAULT_WINDOW_TOKENS = MAX_INPUT_TOKENS - 2
+DEFAULT_OVERLAP_TOKENS = 64
+DEFAULT_BATCH_SIZE = 4
+MAX_REDUCE_ROUNDS = 8
+# New transcript text the rolling summary waits for before it is updated
+DEFAULT_UPDATE_TOKENS = 512
+
+PREFIX = "summarize: "
+
+# Decoding strategies: beam search with the original settings, or greedy decoding, which
+# runs one hypothesis instead of four and is much faster on CPU at a small quality cost
+DECODING = {
+    "beam": {"num_beams": 4, "length_penalty": 2.0, "early_stopping": True},
+    "greedy": {"num_beams": 1},
+}
+
+
+# Function to split a list of token ids into windows of at most window_tokens, where
+# consecutive windows share `overlap` tokens so sentences cut at a border keep context
+def token_windows(token_ids, window_tokens=DEFAULT_WINDOW_TOKENS, overlap=DEFAULT_OVERLAP_TOKENS):
+    if not 0 <= overlap < window_tokens:
+        raise ValueError(f"overlap must be at least 0 and less than window_tokens ({window_tokens}), got {overlap}")
+    if len(token_ids) <= window_tokens:
+        return [token_ids]
+    step = window_tokens - overlap
+    windows = []
+    for start in range(0, len(token_ids), step):
+        windows.append(token_ids[start:start + window_tokens])
+        if start + window_tokens >= len(token_ids):
+            break
+    return windows
+
+
+# Function to wrap a window in BART's <s> ... </s> (tokenizers from transformers 5 no
+# longer have build_inputs_with_special_tokens)
+def with_special_tokens(tokenizer, token_ids):
+    if hasattr(tokenizer, "build_inputs_with_special_tokens"):
+        return tokenizer.build_inputs_with_special_tokens(token_ids)
+    return [tokenizer.bos_token_id, *token_ids, tokenizer.eos_token_id]
+
+
+# Function to summarize several token windows with batched model.generate calls.
+# Windows are sorted by length before batching so each batch pads as little as possible,
+# and the summaries are returned in the original window order. The decoder reuses its
+# cached key/values across steps (use_cache) instead of re-running the whole prefix.
+def summarize_windows(windows, tokenizer, model, max_length=150, min_length=50,
+                      batch_size=DEFAULT_BATCH_SIZE, decoding="beam", shrink_min_length=True):
+    order = sorted(range(len(windows)), key=lambda i: len(windows[i]))
+    summaries = [None] * len(windows)
+    for first in range(0, len(order), batch_size):
+        batch_indices = order[first:first + batch_size]
+        batch = [with_special_tokens(tokenizer, windows[i]) for i in batch_indices]
+        inputs = tokenizer.pad({"input_ids": batch}, padding=True, return_tensors="pt")
+        batch_min_length = min_length
+        if shrink_min_length:
+            # Short tail windows cannot produce min_length tokens of meaningful summary
+            batch_min_length = min(min_length, min(len(ids) for ids in batch) // 2)
+        summary_ids = model.generate(
+            inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            max_length=max_length,
+            min_length=batch_min_length,
+            use_cache=True,
+            **DECODING[decoding],
+        )
+        texts = tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+        for index, text in zip(batch_indices, texts):
+            summaries[index] = text.strip()
+    return summaries
+
+
+# Function to summarize text of any length: the transcript is split into overlapping
+# token windows (map), the windows are summarized in batches, and the joined partial
+# summaries are summarized again (reduce) until they fit in a single input window.
+def summarize_map_reduce(text, tokenizer, model, max_length=150, min_length=50,
+                         window_tokens=DEFAULT_WINDOW_TOKENS, overlap=DEFAULT_OVERLAP_TOKENS,
+                         batch_size=DEFAULT_BATCH_SIZE, decoding="beam"):
+    token_ids = tokenizer.encode(PREFIX + text, add_special_tokens=False)
+    for _ in range(MAX_REDUCE_ROUNDS):
+        if len(token_ids) <= window_tokens:
+            break
+        windows = token_windows(token_ids, window_tokens, overlap)
+        partials = summarize_windows(windows, tokenizer, model, max_length, min_length,
+                                     batch_size=batch_size, decoding=decoding)
+        token_ids = tokenizer.encode(PREFIX + " ".join(partials), add_special_tokens=False)
+    token_ids = token_ids[:window_tokens]
+    return summarize_windows([token_ids], tokenizer, model, max_length, min_length,
+                             batch_size=1, decoding=decoding, shrink_min_length=False)[0]
+
+
+# Summary kept up to date while a transcript is still arriving. New text is buffered until
+# update_tokens of it have come in; then only that text is summarized and the section
+# summary is appended to the running summary. When the sections no longer fit in one input
+# window they are merged by summarizing them together, so no text is summarized twice
+# except the (short) section summaries.
+class RollingSummarizer:
+    def __init__(self, tokenizer, model, max_length=150, min_length=50, update_tokens=DEFAULT_UPDATE_TOKENS,
+                 window_tokens=DEFAULT_WINDOW_TOKENS, overlap=DEFAULT_OVERLAP_TOKENS,
+                 batch_size=DEFAULT_BATCH_SIZE, decoding="beam"):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.max_length = max_length
+        self.min_length = min_length
+        self.update_tokens = update_tokens
+        self.window_tokens = window_tokens
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.decoding = decoding
+        self.sections = []
+        self.pending = []
+        self.pending_tokens = 0
+
+    # The summary of the text summarized so far
+    @property
+    def summary(self):
+        return " ".join(self.sections)
+
+    # Add new transcript text; returns True when the summary was updated
+    def add(self, text):
+        if not text:
+            return False
+        self.pending.append(text)
+        self.pending_tokens += len(self.tokenizer.encode(" " + text, add_special_tokens=False))
+        if self.pending_tokens < self.update_tokens:
+            return False
+        self._summarize_pending()
+        return True
+
+    # Summarize the remaining text and merge the sections into the final summary
+    def finish(self):
+        self._summarize_pending()
+        if len(self.sections) > 1:
+            self._merge()
+        return self.summary
+
+    def _summarize_pending(self):
+        if not self.pending:
+            return
+        text = " ".join(self.pending)
+        token_ids = self.tokenizer.encode(PREFIX + text, add_special_tokens=False)
+        self.pending, self.pending_tokens = [], 0
+        with span("bart.rolling_update", bytes=len(text.encode("utf-8"))):
+            windows = token_windows(token_ids, self.window_tokens, self.overlap)
+            self.sections.extend(summarize_windows(windows, self.tokenizer, self.model, self.max_length,
+                                                   self.min_length, batch_size=self.batch_size,
+                                                   decoding=self.decoding))
+        if len(self.tokenizer.encode(PREFIX + self.summary, add_special_tokens=False)) > self.window_tokens:
+            self._merge()
+
+    def _merge(self):
+        with span("bart.rolling_merge"):
+            self.sections = [summarize_map_reduce(self.summary, self.tokenizer, self.model, self.max_length,
+                                                  self.min_length, self.window_tokens, self.overlap,
+                                                  self.batch_size, self.decoding)]
@@ -0,0 +1,232 @@
+# Headless batch runner: summarize many videos without Streamlit.
+#
+#   python batch.py URL [URL ...] --output results.jsonl
+#   python batch.py "https://www.youtube.com/playlist?list=..." --workers 4
+#   python batch.py ./videos/ --output videos.jsonl
+#   python batch.py --input-file urls.txt --kind youtube_summary --summary-percentage 30
+#
+# Sources are expanded (playlists into their videos, directories into their video files) and
+# processed on a pool of worker processes. Each worker loads the models it needs once and
+# keeps them warm for all the videos it processes. Every finished video is appended to the
+# JSONL output right away; running the same command again skips the videos already done.
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from bart_summarizer import DECODING
+from models import BART_BACKENDS, DEFAULT_BART_BACKEND, registry
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4a", ".mp3", ".wav")
+# Models each job kind uses, loaded once per worker process
+KIND_MODELS = {
+    "video": ["distilbart"],
+    "youtube_summary": [],
+}
+
+
+# Function to tell whether a source is a URL
+def is_url(source):
+    return source.startswith(("http://", "https://", "www."))
+
+
+# Function to expand a playlist URL into the URLs of its videos (other URLs are returned as-is)
+def expand_url(url):
+    if "list=" not in url:
+        return [url]
+    import yt_dlp as youtube_dl
+    with youtube_dl.YoutubeDL({"quiet": True, "extract_flat": "in_playlist"}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    entries = info.get("entries") if info else None
+    if not entries:
+        return [url]
+    return [entry.get("url") or f"https://www.youtube.com/watch?v={entry['id']}" for entry in entries]
+
+
+# Function to list the video files of a directory (recursively, in a stable order)
+def expand_directory(directory):
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                paths.append(os.path.abspath(os.path.join(root, name)))
+    return paths
+
+
+# Function to turn the command-line sources into the list of videos to process
+def expand_sources(sources):
+    videos = []
+    for source in sources:
+        if is_url(source):
+            videos.extend(expand_url(source))
+        elif os.path.isdir(source):
+            videos.extend(expand_directory(source))
+        elif os.path.isfile(source):
+            videos.append(os.path.abspath(source))
+        else:
+            print(f"Skipping '{source}': not a URL, file or directory", file=sys.stderr)
+    return list(dict.fromkeys(videos))  # drop duplicates, keep the order
+
+
+# Function to read the sources already processed successfully from an earlier run's output
+def completed_sources(output_path):
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["source"])
+    return done
+
+
+# Function to list the registry models a worker preloads for a job kind and its options
+def worker_models(kind, options):
+    if kind == "video":
+        return [BART_BACKENDS[options["bart_backend"]]]
+    return KIND_MODELS[kind]
+
+
+# Function that loads the models of a job kind in a worker process, before its first video
+def init_worker(kind, options):
+    try:
+        registry.warm_up(worker_models(kind, options))
+    except (ImportError, OSError, RuntimeError) as e:
+        # A missing package, an unreachable model hub or a corrupt checkpoint would break the
+        # whole pool from the initializer; let each video report it instead
+        print(f"Could not preload models: {type(e).__name__}: {e}", file=sys.stderr)
+
+
+# Function to build the job payload of one video
+def make_payload(kind, source, options):
+    if kind == "youtube_summary":
+        return {"url": source, "summary_percentage": options["summary_percentage"],
+                "target_language": options["target_language"]}
+    payload = {"url": source} if is_url(source) else {"path": source}
+    payload.update(streaming=options["streaming"], concurrency=options["concurrency"],
+                   bart_backend=options["bart_backend"], decoding=options["decoding"])
+    return payload
+
+
+# Function run in a worker process for one video; never raises, so one bad video cannot
+# stop the batch
+def process_video(kind, source, options):
+    from worker import run_job
+    start = time.perf_counter()
+    record = {"source": source, "kind": kind}
+    try:
+        record["result"] = run_job(kind, make_payload(kind, source, options), progress=None)
+        record["status"] = "ok"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["traceback"] = traceback.format_exc()
+    record["seconds"] = time.perf_counter() - start
+    record["finished_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    return record
+
+
+# Function to append one record to the JSONL output and make sure it reaches the disk
+def append_record(f, record):
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+# Function to process the videos on a process pool, writing records as they finish.
+# At most 2 videos per worker are queued at a time, so an interrupted run loses little.
+def run_batch(videos, kind, options, output_path, workers):
+    ok = failed = 0
+    with open(output_path, "a") as output, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(kind, options)) as executor:
+        pending = iter(videos)
+        in_flight = set()
+        try:
+            while True:
+                while len(in_flight) < 2 * workers:
+                    source = next(pending, None)
+                    if source is None:
+                        break
+                    in_flight.add(executor.submit(process_video, kind, source, options))
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    append_record(output, record)
+                    if record["status"] == "ok":
+                        ok += 1
+                    else:
+                        failed += 1
+                    print(f"[{ok + failed}/{len(videos)}] {record['status']}: {record['source']} "
+                          f"({record['seconds']:.1f}s)", file=sys.stderr)
+        except KeyboardInterrupt:
+            for future in in_flight:
+                future.cancel()
+            print("Interrupted; run the same command again to resume.", file=sys.stderr)
+            raise
+    return ok, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize YouTube URLs, playlists or local video files in bulk")
+    parser.add_argument("sources", nargs="*", help="YouTube URLs, playlist URLs, video files or directories")
+    parser.add_argument("--input-file", help="file with one source per line")
+    parser.add_argument("--kind", choices=sorted(KIND_MODELS), default="video",
+                        help="video: speech recognition + DistilBART (app.py); "
+                             "youtube_summary: YouTube transcript + Gemini (project.py)")
+    parser.add_argument("--output", default="summaries.jsonl", help="JSONL file the results are appended to")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help="number of worker processes")
+    parser.add_argument("--no-resume", action="store_true", help="process videos already in the output again")
+    parser.add_argument("--streaming", action=argparse.BooleanOptionalAction, default=True,
+                        help="streaming transcription (video kind)")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel recognition requests per video")
+    parser.add_argument("--bart-backend", choices=list(BART_BACKENDS), default=DEFAULT_BART_BACKEND,
+                        help="DistilBART inference backend (video kind)")
+    parser.add_argument("--decoding", choices=list(DECODING), default="beam",
+                        help="DistilBART decoding (video kind)")
+    parser.add_argument("--summary-percentage", type=int, default=50, help="summary length (youtube_summary kind)")
+    parser.add_argument("--target-language", default="English", help="summary language (youtube_summary kind)")
+    args = parser.parse_args()
+
+    sources = list(args.sources)
+    if args.input_file:
+        with open(args.input_file) as f:
+            sources.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if not sources:
+        parser.error("no sources given")
+
+    videos = expand_sources(sources)
+    if not args.no_resume:
+        done = completed_sources(args.output)
+        videos = [video for video in videos if video not in done]
+        if done:
+            print(f"Resuming: {len(done)} videos already in {args.output}", file=sys.stderr)
+    if not videos:
+        print("Nothing to do.", file=sys.stderr)
+        return
+
+    options = {
+        "streaming": args.streaming,
+        "concurrency": args.concurrency,
+        "bart_backend": args.bart_backend,
+        "decoding": args.decoding,
+        "summary_percentage": args.summary_percentage,
+        "target_language": args.target_language,
+    }
+    ok, failed = run_batch(videos, args.kind, options, args.output, max(1, min(args.workers, len(videos))))
+    print(f"Done: {ok} succeeded, {failed} failed, results in {args.output}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Benchmark: DistilBART backends (PyTorch, int8 dynamic quantization, ONNX Runtime) and
+# decodings (beam search, greedy) on a fixed set of transcripts. Reports the latency of
+# each combination and its ROUGE-L F1 against the PyTorch + beam search summaries, so the
+# speed-up can be weighed against how much the summaries change.
+#
+#   python benchmarks/bench_bart.py --transcripts talk1.txt talk2.txt
+#   python benchmarks/bench_bart.py --tiny --count 5 --words 1500
+#
+# --tiny uses randomly initialized 2-layer checkpoints: the timings exercise the real code
+# paths offline, but the ROUGE-L numbers are then meaningless. The ONNX backend is skipped
+# when optimum[onnxruntime] is not installed.
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+from synthetic import synthetic_transcript  # noqa: E402
+from bart_summarizer import DECODING, summarize_map_reduce  # noqa: E402
+from models import BART_BACKENDS, registry  # noqa: E402
+
+REFERENCE = ("pytorch", "beam")
+
+
+# Function to compute the ROUGE-L F1 score of a candidate against a reference (lowercased words)
+def rouge_l(candidate, reference):
+    a, b = candidate.lower().split(), reference.lower().split()
+    if not a or not b:
+        return 0.0
+    previous = [0] * (len(b) + 1)
+    for word in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if word == other else max(previous[j + 1], current[j]))
+        previous = current
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / len(a), lcs / len(b)
+    return 2 * precision * recall / (precision + recall)
+
+
+# Function to load the transcripts to summarize: the given files, or seeded synthetic ones
+def load_transcripts(args):
+    if args.transcripts:
+        transcripts = []
+        for path in args.transcripts:
+            with open(path, encoding="utf-8") as f:
+                transcripts.append(f.read())
+        return transcripts
+    return [synthetic_transcript(args.words, seed=seed) for seed in range(args.count)]
+
+
+# Function to summarize every transcript with one backend and decoding; returns the summaries
+# and the per-transcript latencies (after one warm-up run on the first transcript)
+def run(backend, decoding, transcripts, args):
+    tokenizer, model = registry.get(BART_BACKENDS[backend])
+    summarize = lambda text: summarize_map_reduce(text, tokenizer, model, max_length=args.max_length,  # noqa: E731
+                                                  min_length=args.min_length, decoding=decoding)
+    summarize(transcripts[0])
+    summaries, latencies = [], []
+    for text in transcripts:
+        start = time.perf_counter()
+        summaries.append(summarize(text))
+        latencies.append(time.perf_counter() - start)
+    return summaries, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DistilBART backends and decodings")
+    parser.add_argument("--transcripts", nargs="+", help="transcript text files (default: synthetic)")
+    parser.add_argument("--count", type=int, default=3, help="number of synthetic transcripts")
+    parser.add_argument("--words", type=int, default=1500, help="words per synthetic transcript")
+    parser.add_argument("--backends", nargs="+", choices=list(BART_BACKENDS), default=list(BART_BACKENDS))
+    parser.add_argument("--decodings", nargs="+", choices=list(DECODING), default=list(DECODING))
+    parser.add_argument("--max-length", type=int, default=150)
+    parser.add_argument("--min-length", type=int, default=50)
+    parser.add_argument("--tiny", action="store_true", help="use tiny random checkpoints (offline)")
+    args = parser.parse_args()
+
+    if args.tiny:
+        from tiny_models import register_tiny_models
+        register_tiny_models(registry)
+    transcripts = load_transcripts(args)
+    combinations = [REFERENCE] + [(backend, decoding) for backend in args.backends for decoding in args.decodings
+                                  if (backend, decoding) != REFERENCE]
+    reference = None
+    for backend, decoding in combinations:
+        try:
+            summaries, latencies = run(backend, decoding, transcripts, args)
+        except (ImportError, KeyError) as e:
+            print(json.dumps({"backend": backend, "decoding": decoding, "skipped": str(e)}))
+            continue
+        if reference is None:
+            reference = summaries
+        print(json.dumps({
+            "backend": backend,
+            "decoding": decoding,
+            "model_bytes": registry.size_of(BART_BACKENDS[backend]),
+            "mean_seconds": sum(latencies) / len(latencies),
+            "total_seconds": sum(latencies),
+            "rouge_l_vs_reference": sum(map(rouge_l, summaries, reference)) / len(summaries),
+        }))
+
+
+if __name__ == "__main__":
+    main()
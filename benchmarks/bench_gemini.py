@@ -0,0 +1,81 @@
+# Benchmark: the old two-call Gemini summary against the single streamed request (and the
+# map-reduce path for transcripts too long for one request), on the local stub model so
+# latency and token usage can be compared offline
+#
+#   python benchmarks/bench_gemini.py --words 6000 --summary-percentage 50
+#   python benchmarks/bench_gemini.py --words 60000 --concurrency 1 4 8
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gemini_client import StubModel, SummaryClient, UsageStats, estimate_tokens, needs_map_reduce  # noqa: E402
+
+PROMPT = "You are a YouTube video summarizer. Summarize the transcript in a concise format."
+
+
+# Function to make a synthetic transcript of the given length
+def synthetic_transcript(words, seed=0):
+    vocabulary = ["video", "speaker", "explains", "model", "data", "result", "first", "then",
+                  "important", "example", "shows", "because", "the", "a", "and", "of"]
+    rng = random.Random(seed)
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+# The summarization as it was before: summarize, then shorten the summary in a second call
+def two_call_summary(model, transcript_text, summary_percentage, usage):
+    start = time.perf_counter()
+    first_prompt = PROMPT + "\nHere is the text to summarize:\n" + transcript_text
+    summary = model.generate_content(first_prompt)
+    target_summary_length = int(len(summary.text) * (summary_percentage / 100))
+    full_prompt = (
+        f"Here is the text to summarize:\n{summary.text}\n\n"
+        f"Please summarize the above text to approximately {target_summary_length} in a concised format."
+    )
+    response = model.generate_content(full_prompt)
+    # The stub reports usage per response; the second call only sees the first summary
+    prompt_tokens = estimate_tokens(first_prompt) + estimate_tokens(full_prompt)
+    output_tokens = summary.usage_metadata.candidates_token_count + response.usage_metadata.candidates_token_count
+    usage.record(prompt_tokens, output_tokens, None, time.perf_counter() - start)
+    return response.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark two-call vs single-pass Gemini summarization")
+    parser.add_argument("--words", type=int, default=6000, help="transcript length in words")
+    parser.add_argument("--summary-percentage", type=int, default=50)
+    parser.add_argument("--first-token-latency", type=float, default=0.5, help="stub time to first token (s)")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="stub time per output token (s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4],
+                        help="concurrent chunk requests of the map-reduce path")
+    parser.add_argument("--requests-per-minute", type=int, default=600)
+    args = parser.parse_args()
+
+    transcript_text = synthetic_transcript(args.words)
+
+    def stub():
+        return StubModel(first_token_latency=args.first_token_latency, token_latency=args.token_latency)
+
+    two_call = UsageStats()
+    two_call_summary(stub(), transcript_text, args.summary_percentage, two_call)
+    result = two_call.as_dict()
+    result["strategy"] = "two-call"
+    print(json.dumps(result))
+
+    strategy = "map-reduce" if needs_map_reduce(transcript_text) else "single-pass"
+    for concurrency in args.concurrency:
+        client = SummaryClient(backend="stub", model=stub(), max_concurrency=concurrency,
+                               requests_per_minute=args.requests_per_minute)
+        start = time.perf_counter()
+        summary = client.summarize(transcript_text, PROMPT, args.summary_percentage)
+        result = client.usage.as_dict()
+        # total_seconds adds up the requests; wall_seconds shows what concurrency saves
+        result.update(strategy=strategy, concurrency=concurrency, wall_seconds=time.perf_counter() - start,
+                      summary_words=len(summary.split()))
+        print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
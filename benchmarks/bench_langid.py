@@ -0,0 +1,66 @@
+# Benchmark: sampled language identification against langdetect over the whole transcript,
+# on synthetic transcripts of increasing length
+#
+#   python benchmarks/bench_langid.py --segments 100 1000 10000
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from language_detection import LanguageIdentifier  # noqa: E402
+
+SENTENCES = {
+    "en": ["so today we are going to talk about how the model works",
+           "the first thing you need to know is where the data comes from",
+           "and that is why this result is so important for everyone"],
+    "es": ["hoy vamos a hablar de cómo funciona el modelo",
+           "lo primero que hay que saber es de dónde vienen los datos",
+           "y por eso este resultado es tan importante para todos"],
+    "de": ["heute sprechen wir darüber wie das modell funktioniert",
+           "als erstes muss man wissen woher die daten kommen",
+           "und deshalb ist dieses ergebnis für alle so wichtig"],
+}
+
+
+# Function to make a transcript with one segment per line
+def synthetic_transcript(segments, language, seed=0):
+    rng = random.Random(seed)
+    return "\n".join(rng.choice(SENTENCES[language]) for _ in range(segments))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sampled vs whole-text language identification")
+    parser.add_argument("--segments", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--language", choices=sorted(SENTENCES), default="es")
+    args = parser.parse_args()
+
+    from langdetect import DetectorFactory, detect
+    DetectorFactory.seed = 0
+    detect("load the language profiles before timing")
+    identifier = LanguageIdentifier()
+    for segments in args.segments:
+        transcript = synthetic_transcript(segments, args.language)
+
+        start = time.perf_counter()
+        whole = detect(transcript)
+        whole_seconds = time.perf_counter() - start
+
+        sampled = identifier.identify(transcript)
+        sampled_seconds = identifier.last_seconds
+        identifier.identify(transcript, known_code=args.language)
+        print(json.dumps({
+            "segments": segments,
+            "chars": len(transcript),
+            "whole_text": whole,
+            "whole_text_seconds": whole_seconds,
+            "sampled": sampled,
+            "sampled_seconds": sampled_seconds,
+            "metadata_seconds": identifier.last_seconds,
+        }))
+
+
+if __name__ == "__main__":
+    main()
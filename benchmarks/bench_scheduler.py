@@ -0,0 +1,58 @@
+# Benchmark: RecognitionScheduler against a local fake recognizer with latency and failures
+#
+#   python benchmarks/bench_scheduler.py --chunks 200 --concurrency 1 4 8 --failure-rate 0.1
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scheduler import RecognitionScheduler, TransientRecognitionError  # noqa: E402
+
+
+# Fake recognizer: sleeps like a network call and fails transiently at the given rate
+class FakeRecognizer:
+    def __init__(self, latency=0.05, jitter=0.03, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+
+    def __call__(self, chunk):
+        time.sleep(self.latency + self.random.uniform(0, self.jitter))
+        if self.random.random() < self.failure_rate:
+            raise TransientRecognitionError("simulated 503")
+        return f"chunk {chunk}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recognition scheduler")
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    for concurrency in args.concurrency:
+        recognizer = FakeRecognizer(latency=args.latency, failure_rate=args.failure_rate)
+        scheduler = RecognitionScheduler(recognizer, backend="local", concurrency=concurrency,
+                                         backoff=0.01, timeout=5.0)
+        first_result = None
+        start = time.perf_counter()
+        texts = []
+        for index, text in scheduler.run(range(args.chunks)):
+            if first_result is None:
+                first_result = time.perf_counter() - start
+            texts.append(text)
+        assert len(texts) == args.chunks
+        assert all(text in ("", f"chunk {i}") for i, text in enumerate(texts))
+        stats = scheduler.stats.as_dict()
+        stats["concurrency"] = concurrency
+        stats["time_to_first_result_s"] = first_result
+        print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
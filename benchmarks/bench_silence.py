@@ -0,0 +1,66 @@
+# Benchmark: vectorized NumPy silence splitting (silence.py) vs pydub's split_on_silence
+#
+#   python benchmarks/bench_silence.py --hours 1 3
+#   python benchmarks/bench_silence.py --hours 0.1 --check   # also compare chunk boundaries
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from pydub import AudioSegment
+import pydub.silence
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import silence  # noqa: E402
+
+
+# Function to build speech-like bursts separated by pauses (16 kHz mono, 16-bit)
+def synthetic_audio(hours, sample_rate=16000, seed=0):
+    rng = np.random.default_rng(seed)
+    total = int(hours * 3600 * sample_rate)
+    samples = np.empty(total, dtype=np.int16)
+    position = 0
+    while position < total:
+        speech = int(rng.uniform(1.0, 8.0) * sample_rate)
+        pause = int(rng.uniform(0.2, 2.0) * sample_rate)
+        end = min(position + speech, total)
+        samples[position:end] = rng.normal(0, 3000, end - position).astype(np.int16)
+        position = end
+        end = min(position + pause, total)
+        samples[position:end] = rng.normal(0, 20, end - position).astype(np.int16)
+        position = end
+    return AudioSegment(data=samples.tobytes(), sample_width=2, frame_rate=sample_rate, channels=1)
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NumPy vs pydub silence splitting")
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 3])
+    parser.add_argument("--min-silence-len", type=int, default=500)
+    parser.add_argument("--keep-silence", type=int, default=500)
+    parser.add_argument("--check", action="store_true",
+                        help="also run pydub's split_on_silence and compare the chunk boundaries")
+    args = parser.parse_args()
+
+    for hours in args.hours:
+        sound = synthetic_audio(hours)
+        params = dict(min_silence_len=args.min_silence_len, silence_thresh=sound.dBFS - 14,
+                      keep_silence=args.keep_silence)
+        chunks, numpy_seconds = timed(silence.split_on_silence, sound, **params)
+        print(f"{hours:g}h audio: numpy {numpy_seconds:.2f}s, {len(chunks)} chunks "
+              f"(real-time factor {numpy_seconds / (hours * 3600):.5f})")
+        if args.check:
+            reference, pydub_seconds = timed(pydub.silence.split_on_silence, sound, **params)
+            same = [len(c) for c in chunks] == [len(c) for c in reference]
+            print(f"{hours:g}h audio: pydub {pydub_seconds:.2f}s, {len(reference)} chunks, "
+                  f"speedup {pydub_seconds / numpy_seconds:.1f}x, identical boundaries: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Benchmark: handling an uploaded video by reading it whole, writing it out and then
+# extracting the audio, vs copying it in fixed-size blocks while ffmpeg decodes the same
+# blocks from a pipe (ingest.decode_upload_to_pcm_wav). Reports the wall time and the
+# peak traced Python memory of each path.
+#
+#   python benchmarks/bench_upload.py --sizes-mb 100 500 2000
+#   python benchmarks/bench_upload.py --file lecture.mp4
+#
+# The upload is held in a BytesIO, like Streamlit's UploadedFile. Synthetic uploads are
+# 16 kHz speech-like WAV files. Without ffmpeg only the copy itself is compared.
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+from synthetic import SAMPLE_RATE, synthetic_speech  # noqa: E402
+from ingest import FFMPEG, copy_upload, decode_to_pcm_wav, decode_upload_to_pcm_wav  # noqa: E402
+
+
+# Function to build an in-memory WAV upload of about size_mb megabytes (one minute of
+# synthetic speech repeated)
+def synthetic_upload(size_mb, seed=0):
+    minute = synthetic_speech(60, seed=seed).tobytes()
+    data_size = int(size_mb * 2**20) // 2 * 2
+    upload = io.BytesIO()
+    upload.write(b"RIFF" + (36 + data_size).to_bytes(4, "little") + b"WAVE")
+    upload.write(b"fmt " + (16).to_bytes(4, "little") + np.array([1, 1], dtype="<u2").tobytes()
+                 + np.array([SAMPLE_RATE, 2 * SAMPLE_RATE], dtype="<u4").tobytes()
+                 + np.array([2, 16], dtype="<u2").tobytes())
+    upload.write(b"data" + data_size.to_bytes(4, "little"))
+    for start in range(0, data_size, len(minute)):
+        upload.write(minute[:min(len(minute), data_size - start)])
+    upload.seek(0)
+    return upload
+
+
+# The original path: read the whole upload, write it out, then extract the audio
+def read_then_decode(upload, directory, decode):
+    video_path = os.path.join(directory, "upload.bin")
+    upload.seek(0)
+    with open(video_path, "wb") as f:
+        f.write(upload.read())
+    if decode:
+        decode_to_pcm_wav(video_path, os.path.join(directory, "audio.wav"))
+
+
+# The streaming path: copy in fixed-size blocks, piping the same blocks to ffmpeg
+def stream_and_decode(upload, directory, decode):
+    video_path = os.path.join(directory, "upload.bin")
+    if decode:
+        decode_upload_to_pcm_wav(upload, os.path.join(directory, "audio.wav"), video_path)
+    else:
+        copy_upload(upload, video_path)
+
+
+def measure(path, upload, decode):
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        start = time.perf_counter()
+        path(upload, directory, decode)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark whole-read vs streaming upload handling")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[100, 500])
+    parser.add_argument("--file", help="benchmark a real video file instead of synthetic uploads")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    decode = shutil.which(FFMPEG) is not None
+    if not decode:
+        print(f"{FFMPEG} not found: comparing the copies only", file=sys.stderr)
+    if args.file:
+        with open(args.file, "rb") as f:
+            uploads = [(os.path.getsize(args.file) / 2**20, io.BytesIO(f.read()))]
+    else:
+        uploads = [(size_mb, synthetic_upload(size_mb)) for size_mb in args.sizes_mb]
+
+    for size_mb, upload in uploads:
+        result = {"size_mb": round(size_mb, 1), "decode": decode}
+        for name, path in (("read_whole", read_then_decode), ("streaming", stream_and_decode)):
+            runs = [measure(path, upload, decode) for _ in range(args.repeat)]
+            result[f"{name}_seconds"] = float(np.median([seconds for seconds, _ in runs]))
+            result[f"{name}_peak_mb"] = max(peak for _, peak in runs) / 2**20
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
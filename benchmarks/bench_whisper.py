@@ -0,0 +1,46 @@
+# Benchmark: real-time factor of the batched Whisper engine (whisper_engine.py) vs model.transcribe
+#
+#   python benchmarks/bench_whisper.py lecture.mp3 --models tiny base --batch-size 8
+#
+# Real-time factor = processing seconds / audio seconds (lower is faster).
+import argparse
+import json
+import os
+import sys
+import time
+
+import whisper
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import whisper_engine  # noqa: E402
+from models import registry  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched Whisper transcription")
+    parser.add_argument("audio", help="audio or video file to transcribe")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base"])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--skip-baseline", action="store_true", help="do not run model.transcribe")
+    args = parser.parse_args()
+
+    duration = len(whisper.load_audio(args.audio)) / whisper_engine.SAMPLE_RATE
+    for size in args.models:
+        model = registry.get(f"whisper-{size}")
+        rows = []
+        if not args.skip_baseline:
+            start = time.perf_counter()
+            model.transcribe(args.audio, fp16=False)
+            rows.append(("transcribe", time.perf_counter() - start))
+        start = time.perf_counter()
+        whisper_engine.transcribe_batched(args.audio, model_size=size, batch_size=args.batch_size,
+                                          threads=args.threads)
+        rows.append(("batched", time.perf_counter() - start))
+        for engine, seconds in rows:
+            print(json.dumps({"model": size, "engine": engine, "audio_seconds": round(duration, 1),
+                              "seconds": round(seconds, 2), "real_time_factor": round(seconds / duration, 4)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# Offline benchmark suite for the video-to-summary pipeline.
+#
+#   python benchmarks/suite.py run --seconds 600 --repeat 5
+#   python benchmarks/suite.py run --stages silence_split bart_summary --output before.json
+#   python benchmarks/suite.py compare before.json after.json --threshold 0.1
+#
+# Every stage runs on synthetic speech-plus-silence audio or synthetic transcripts, with local
+# stand-ins for the network services (stub recognizer, stub Gemini model, local translator)
+# and tiny randomly initialized BART/Whisper checkpoints. For each stage the suite records the
+# latency percentiles over the runs, the throughput, the peak traced Python memory and the
+# process peak RSS, and writes everything to a JSON file that `compare` checks for regressions.
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from pydub import AudioSegment
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+from synthetic import SAMPLE_RATE, synthetic_speech, synthetic_transcript, write_wav  # noqa: E402
+from tiny_models import register_tiny_models  # noqa: E402
+from models import registry  # noqa: E402
+from profiler import peak_rss_bytes, profiler, trace  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+STUB_LATENCY = 0.02  # seconds per stub network request
+TARGET_LANGUAGES = ["French", "German", "Spanish", "Telugu", "Hindi", "Malayalam", "Tamil", "Kannada"]
+
+
+# Raised by a stage whose dependencies are not available here
+class StageSkipped(Exception):
+    pass
+
+
+# Inputs shared by the stages of one run
+class Inputs:
+    def __init__(self, seconds, words, seed=0):
+        self.seconds = seconds
+        self.samples = synthetic_speech(seconds, seed=seed)
+        self.sound = AudioSegment(data=self.samples.tobytes(), sample_width=2, frame_rate=SAMPLE_RATE, channels=1)
+        self.transcript = synthetic_transcript(words, seed=seed)
+        self.workspace = tempfile.mkdtemp(prefix="video-summary-bench-")
+        self.wav_path = write_wav(os.path.join(self.workspace, "speech.wav"), self.samples)
+
+    def cleanup(self):
+        shutil.rmtree(self.workspace, ignore_errors=True)
+
+
+def split_chunks(inputs):
+    from silence import split_on_silence
+    return split_on_silence(inputs.sound, min_silence_len=500, silence_thresh=inputs.sound.dBFS - 14,
+                            keep_silence=500)
+
+
+def stub_recognizer(chunk):
+    time.sleep(STUB_LATENCY)
+    return " ".join(["word"] * max(1, int(len(chunk) / 400)))
+
+
+# Stages: each returns the amount of work done and its unit, for the throughput
+
+def stage_silence_split(inputs):
+    split_chunks(inputs)
+    return inputs.seconds, "audio_s"
+
+
+def stage_streaming_split(inputs):
+    from audio_stream import stream_split_on_silence
+    raw = inputs.sound.raw_data
+    block = 2 * SAMPLE_RATE  # one second of 16-bit mono PCM
+    for _ in stream_split_on_silence(raw[i:i + block] for i in range(0, len(raw), block)):
+        pass
+    return inputs.seconds, "audio_s"
+
+
+def stage_recognition(inputs, concurrency=8):
+    from scheduler import RecognitionScheduler
+    chunks = split_chunks(inputs)
+    scheduler = RecognitionScheduler(stub_recognizer, backend="local", concurrency=concurrency, backoff=0.01)
+    scheduler.run_all(chunks)
+    return len(chunks), "chunks"
+
+
+def stage_transcription(inputs):
+    try:
+        import audio_pipeline
+    except ImportError as e:
+        raise StageSkipped(f"audio_pipeline unavailable: {e}")
+    audio_pipeline.RECOGNITION_BACKEND = "stub"
+    audio_pipeline.STUB_RECOGNITION_LATENCY = STUB_LATENCY
+    audio_pipeline.get_large_audio_transcription_on_silence(inputs.wav_path, streaming=False, concurrency=8)
+    return inputs.seconds, "audio_s"
+
+
+def stage_bart_summary(inputs):
+    from bart_summarizer import summarize_map_reduce
+    tokenizer, model = registry.get("distilbart")
+    summarize_map_reduce(inputs.transcript, tokenizer, model, max_length=60, min_length=10)
+    return len(inputs.transcript.split()), "words"
+
+
+def stage_whisper(inputs):
+    from whisper_engine import transcribe_batched
+    transcribe_batched(inputs.samples.astype(np.float32) / 32768, model_size="bench", batch_size=8)
+    return inputs.seconds, "audio_s"
+
+
+def stage_gemini_summary(inputs):
+    from gemini_client import StubModel, SummaryClient
+    client = SummaryClient(backend="stub", model=StubModel(first_token_latency=STUB_LATENCY, token_latency=0.0))
+    client.summarize(inputs.transcript, "Summarize the transcript.", 50)
+    return len(inputs.transcript.split()), "words"
+
+
+def stage_translation(inputs):
+    from cache import ResultCache
+    from translation import LocalBackend, TranslationEngine
+    with tempfile.TemporaryDirectory() as directory:
+        engine = TranslationEngine(backend=LocalBackend(latency=STUB_LATENCY),
+                                   cache=ResultCache(path=os.path.join(directory, "cache.sqlite3")),
+                                   detect=lambda text: "en")
+        summary = " ".join(inputs.transcript.splitlines()[:40])
+        engine.translate_many(summary, TARGET_LANGUAGES)
+    return len(TARGET_LANGUAGES), "languages"
+
+
+def stage_end_to_end(inputs):
+    from bart_summarizer import summarize_map_reduce
+    from scheduler import RecognitionScheduler
+    from translation import LocalBackend, TranslationEngine
+    from cache import ResultCache
+    chunks = split_chunks(inputs)
+    scheduler = RecognitionScheduler(stub_recognizer, backend="local", concurrency=8, backoff=0.01)
+    transcription = " ".join(filter(None, scheduler.run_all(chunks)))
+    tokenizer, model = registry.get("distilbart")
+    summary = summarize_map_reduce(transcription, tokenizer, model, max_length=60, min_length=10)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = TranslationEngine(backend=LocalBackend(latency=STUB_LATENCY),
+                                   cache=ResultCache(path=os.path.join(directory, "cache.sqlite3")),
+                                   detect=lambda text: "en")
+        engine.translate(summary, "French")
+    return inputs.seconds, "audio_s"
+
+
+STAGES = {
+    "silence_split": stage_silence_split,
+    "streaming_split": stage_streaming_split,
+    "recognition": stage_recognition,
+    "transcription": stage_transcription,
+    "bart_summary": stage_bart_summary,
+    "whisper": stage_whisper,
+    "gemini_summary": stage_gemini_summary,
+    "translation": stage_translation,
+    "end_to_end": stage_end_to_end,
+}
+
+
+def percentiles(values):
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "mean": float(np.mean(values)),
+        "min": float(np.min(values)),
+        "max": float(np.max(values)),
+    }
+
+
+# Function to run one stage `repeat` times (after a warm-up run) and summarize the runs.
+# The timed runs are not traced by tracemalloc, whose overhead would inflate the latencies;
+# the peak traced memory is measured in one more run of its own.
+def run_stage(name, inputs, repeat):
+    stage = STAGES[name]
+    stage(inputs)  # warm-up: model loading, imports, caches
+    latencies = []
+    for _ in range(repeat):
+        with trace(name) as stage_trace:
+            start = time.perf_counter()
+            amount, unit = stage(inputs)
+            latencies.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        stage(inputs)
+        peak_traced = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    spans = {}
+    for span in stage_trace.spans:
+        spans[span.name] = spans.get(span.name, 0.0) + span.seconds
+    return {
+        "runs": repeat,
+        "latency_s": percentiles(latencies),
+        "throughput": amount / float(np.median(latencies)),
+        "unit": f"{unit}/s",
+        "peak_traced_bytes": peak_traced,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "spans_s": spans,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=BENCHMARKS_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args):
+    register_tiny_models(registry)
+    inputs = Inputs(args.seconds, args.words, seed=args.seed)
+    results = {
+        "meta": {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seconds": args.seconds,
+            "words": args.words,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "stages": {},
+    }
+    try:
+        for name in args.stages:
+            try:
+                result = run_stage(name, inputs, args.repeat)
+            except StageSkipped as e:
+                result = {"skipped": str(e)}
+            results["stages"][name] = result
+            print(json.dumps({"stage": name, **{key: value for key, value in result.items() if key != "spans_s"}}))
+    finally:
+        inputs.cleanup()
+    results["meta"]["stage_totals"] = profiler.stages()
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+# Compare two result files; a stage regresses when its median latency grew by more than threshold
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["stages"]
+    with open(args.candidate) as f:
+        candidate = json.load(f)["stages"]
+    regressions = []
+    print(f"{'stage':<16} {'p50 before':>11} {'p50 after':>11} {'change':>8} {'throughput':>12}")
+    for name, after in candidate.items():
+        before = baseline.get(name)
+        if not before or "skipped" in before or "skipped" in after:
+            continue
+        old, new = before["latency_s"]["p50"], after["latency_s"]["p50"]
+        change = (new - old) / old if old else 0.0
+        print(f"{name:<16} {old:>10.3f}s {new:>10.3f}s {change:>+7.1%} {after['throughput']:>8.1f} {after['unit']}")
+        if change > args.threshold:
+            regressions.append(name)
+    if regressions:
+        print(f"Regressions (median latency +{args.threshold:.0%} or more): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the video-to-summary pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and write a JSON result file")
+    run_parser.add_argument("--seconds", type=float, default=300, help="length of the synthetic audio")
+    run_parser.add_argument("--words", type=int, default=3000, help="length of the synthetic transcript")
+    run_parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (after one warm-up)")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    run_parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>.json)")
+    run_parser.set_defaults(function=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="relative median latency increase reported as a regression")
+    compare_parser.set_defaults(function=compare)
+
+    args = parser.parse_args()
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
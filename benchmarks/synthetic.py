@@ -0,0 +1,51 @@
+# Synthetic inputs for the benchmarks: speech-like audio with pauses, and transcripts
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+# Function to make speech-like audio: voiced bursts (a wobbling fundamental with harmonics,
+# syllable-rate amplitude envelope and breath noise) separated by near-silent pauses.
+# Returns 16-bit mono samples.
+def synthetic_speech(seconds, sample_rate=SAMPLE_RATE, seed=0, min_speech=1.0, max_speech=8.0,
+                     min_pause=0.3, max_pause=2.0):
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    samples = np.zeros(total, dtype=np.float32)
+    position = 0
+    while position < total:
+        length = min(int(rng.uniform(min_speech, max_speech) * sample_rate), total - position)
+        t = np.arange(length, dtype=np.float32) / sample_rate
+        pitch = rng.uniform(90, 220) * (1 + 0.05 * np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+        voiced = sum(np.sin(harmonic * phase) / harmonic for harmonic in range(1, 6))
+        syllables = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 6) * t) ** 2
+        burst = voiced * syllables + rng.normal(0, 0.05, length)
+        samples[position:position + length] = 0.25 * burst
+        position += length
+        pause = min(int(rng.uniform(min_pause, max_pause) * sample_rate), total - position)
+        samples[position:position + pause] = rng.normal(0, 0.002, pause)
+        position += pause
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+
+
+# Function to write 16-bit mono samples as a WAV file
+def write_wav(path, samples, sample_rate=SAMPLE_RATE):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+    return path
+
+
+# Function to make a transcript of about `words` words, one segment per line
+def synthetic_transcript(words, seed=0, words_per_segment=12):
+    vocabulary = ("today the speaker explains how the model uses data to reach an important result "
+                  "then shows another example of the method in practice because it matters").split()
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(vocabulary, size=words)
+    lines = [" ".join(picked[i:i + words_per_segment]) + "." for i in range(0, words, words_per_segment)]
+    return "\n".join(lines)
@@ -0,0 +1,61 @@
+# Tiny randomly initialized checkpoints with the real architectures, so the BART and Whisper
+# code paths can be benchmarked offline (timings, not output quality)
+import torch
+
+TINY_BART = "distilbart"  # registered under the production name, so the pipeline code picks it up
+TINY_BART_INT8 = "distilbart-int8"
+TINY_WHISPER = "whisper-bench"  # transcribe_batched(..., model_size="bench")
+
+
+# Function to build a word-level BART tokenizer and a 2-layer BART model
+def tiny_bart(vocab_size=2048, seed=0):
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import BartConfig, BartForConditionalGeneration, PreTrainedTokenizerFast
+
+    special = ["<pad>", "<s>", "</s>", "<unk>"]
+    words = [f"w{i}" for i in range(vocab_size - len(special))]
+    vocab = {token: i for i, token in enumerate(special + words)}
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend, pad_token="<pad>", bos_token="<s>",
+                                        eos_token="</s>", unk_token="<unk>")
+
+    torch.manual_seed(seed)
+    config = BartConfig(vocab_size=vocab_size, d_model=64, encoder_layers=2, decoder_layers=2,
+                        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=128,
+                        decoder_ffn_dim=128, max_position_embeddings=1024, pad_token_id=0,
+                        bos_token_id=1, eos_token_id=2, decoder_start_token_id=2)
+    model = BartForConditionalGeneration(config).eval()
+    return tokenizer, model
+
+
+# Function to build a 1-layer Whisper model with the real input and vocabulary sizes
+def tiny_whisper(seed=0):
+    from whisper.model import ModelDimensions, Whisper
+
+    torch.manual_seed(seed)
+    dims = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=64, n_audio_head=2, n_audio_layer=1,
+                           n_vocab=51865, n_text_ctx=448, n_text_state=64, n_text_head=2, n_text_layer=1)
+    return Whisper(dims).eval()
+
+
+# Function to register the tiny checkpoints in the model registry
+def register_tiny_models(registry):
+    from models import estimate_model_bytes
+
+    def load_bart():
+        tokenizer, model = tiny_bart()
+        return (tokenizer, model), estimate_model_bytes(model)
+
+    def load_bart_int8():
+        tokenizer, model = tiny_bart()
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return (tokenizer, model), estimate_model_bytes(model)
+
+    def load_whisper():
+        model = tiny_whisper()
+        return model, estimate_model_bytes(model)
+
+    registry.register(TINY_BART, load_bart)
+    registry.register(TINY_BART_INT8, load_bart_int8)
+    registry.register(TINY_WHISPER, load_whisper)
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlparse
+
+# Location and limits of the on-disk cache, override with environment variables
+CACHE_PATH = os.getenv("VIDEO_SUMMARY_CACHE_PATH", os.path.join(".cache", "video_summary.sqlite3"))
+DEFAULT_MAX_BYTES = int(os.getenv("VIDEO_SUMMARY_CACHE_MAX_MB", "512")) * 1024 * 1024
+DEFAULT_TTL = int(os.getenv("VIDEO_SUMMARY_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+
+
+# Function to get the video ID from the usual YouTube URL forms
+def video_id_from_url(url):
+    parsed = urlparse(url.strip())
+    if parsed.hostname in ("youtu.be", "www.youtu.be"):
+        return parsed.path.lstrip("/").split("/")[0] or None
+    query = parse_qs(parsed.query)
+    if "v" in query:
+        return query["v"][0]
+    parts = [part for part in parsed.path.split("/") if part]
+    if len(parts) >= 2 and parts[0] in ("shorts", "embed", "live", "v"):
+        return parts[1]
+    if "v=" in url:
+        return url.split("v=")[1].split("&")[0]
+    return None
+
+
+# Function to hash media content (bytes, a file path or a file-like object) in fixed-size blocks
+def media_digest(source, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+        return digest.hexdigest()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    position = source.tell()
+    source.seek(0)
+    for block in iter(lambda: source.read(block_size), b""):
+        digest.update(block)
+    source.seek(position)
+    return digest.hexdigest()
+
+
+# Function to build a cache key from the source (video ID or media hash), the stage
+# and every parameter that changes the result (model name, lengths, language, ...)
+def make_key(source_id, stage, **params):
+    encoded = json.dumps(params, sort_keys=True, default=str)
+    params_hash = hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+    return f"{stage}:{source_id}:{params_hash}"
+
+
+# SQLite-backed cache of JSON-serializable results with TTLs and size-based LRU eviction
+class ResultCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, default_ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires_at)")
+            # Running total of the entry sizes, kept by triggers so writes never scan the table
+            # (and every process sharing the file sees the same total)
+            conn.execute("CREATE TABLE IF NOT EXISTS totals ("
+                         " id INTEGER PRIMARY KEY CHECK (id = 0),"
+                         " size INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO totals (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM entries")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries"
+                         " BEGIN UPDATE totals SET size = size + new.size WHERE id = 0; END")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries"
+                         " BEGIN UPDATE totals SET size = size - old.size WHERE id = 0; END")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries"
+                         " BEGIN UPDATE totals SET size = size + new.size - old.size WHERE id = 0; END")
+
+    # Open a short-lived connection that commits on success and is always closed
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # Return the cached value for a key, or None if it is missing or expired
+    def get(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    # Store a value; ttl=None uses the default TTL and ttl=0 means it never expires
+    def set(self, key, value, ttl=None):
+        self.set_many([(key, value)], ttl)
+
+    # Store several (key, value) pairs in one transaction, e.g. a translated batch
+    def set_many(self, items, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        rows = []
+        for key, value in items:
+            encoded = json.dumps(value)
+            rows.append((key, encoded, len(encoded.encode("utf-8")), expires_at, now))
+        if not rows:
+            return
+        with self._lock, self._connect() as conn:
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete fires no trigger
+            conn.executemany(
+                "INSERT INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size,"
+                " expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+                rows,
+            )
+            self._evict(conn, now)
+
+    # Return the cached value, or compute, store and return it
+    def get_or_compute(self, key, compute, ttl=None):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value:
+                self.set(key, value, ttl)
+        return value
+
+    # Yield a cached text in one piece, or the pieces of stream() as they arrive and cache
+    # their concatenation once the stream has finished
+    def get_or_stream(self, key, stream, ttl=None):
+        value = self.get(key)
+        if value is not None:
+            yield value
+            return
+        pieces = []
+        for piece in stream():
+            pieces.append(piece)
+            yield piece
+        value = "".join(pieces).strip()
+        if value:
+            self.set(key, value, ttl)
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    # Drop expired entries, then the least recently used ones until the size limit holds
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        total = conn.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def size(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Function to get the process-wide cache instance
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
@@ -0,0 +1,332 @@
+import asyncio
+import contextvars
+import os
+import re
+import threading
+import time
+from types import SimpleNamespace
+from profiler import instrument, span
+
+DEFAULT_MODEL = "gemini-pro"
+# "gemini" calls the Gemini API, "stub" uses the local StubModel (offline benchmarks)
+SUMMARY_BACKEND = os.getenv("SUMMARY_BACKEND", "gemini")
+
+# An unconstrained "concise" summary is roughly this fraction of the transcript's words.
+# The old code asked for a summary first and then shortened it to summary_percentage of
+# that length; estimating the first summary's length lets us ask for the result directly.
+CONCISE_SUMMARY_RATIO = 0.15
+MIN_SUMMARY_WORDS = 30
+MAX_SUMMARY_WORDS = 2000
+# Rough size of a token, for budgets and for accounting when the API reports no usage
+CHARS_PER_TOKEN = 4
+TOKENS_PER_WORD = 1.4
+
+# Transcripts estimated above this many tokens are summarized map-reduce, in chunks of
+# CHUNK_TOKENS; gemini-pro accepts 30720 input tokens, the rest is headroom for the estimate
+SINGLE_CALL_TOKENS = int(os.getenv("GEMINI_SINGLE_CALL_TOKENS", "24000"))
+CHUNK_TOKENS = int(os.getenv("GEMINI_CHUNK_TOKENS", "8000"))
+# Limits of the concurrent chunk requests
+MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))
+# Give up shrinking partial summaries after this many map rounds and merge what there is
+MAX_MAP_ROUNDS = 4
+
+PART_INSTRUCTION = "This is part {part} of {parts} of a longer transcript; summarize only this part."
+MERGE_INSTRUCTION = ("The text below is made of the summaries of consecutive parts of one video; "
+                     "merge them into a single summary without repeating points.")
+
+
+# Function to estimate the number of tokens in a text
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+# Function to tell whether a transcript is too long for a single summarization request
+def needs_map_reduce(transcript_text, single_call_tokens=SINGLE_CALL_TOKENS):
+    return estimate_tokens(transcript_text) > single_call_tokens
+
+
+# Function to split a transcript into chunks of about chunk_tokens along segment boundaries
+# (one transcript segment per line); lines longer than a chunk are cut between words
+def split_transcript(transcript_text, chunk_tokens=CHUNK_TOKENS):
+    max_chars = chunk_tokens * CHARS_PER_TOKEN
+    pieces = []
+    for line in transcript_text.splitlines():
+        words = line.split()
+        while words:
+            length = 0
+            count = 0
+            while count < len(words) and (count == 0 or length + len(words[count]) + 1 <= max_chars):
+                length += len(words[count]) + 1
+                count += 1
+            pieces.append(" ".join(words[:count]))
+            words = words[count:]
+
+    chunks = []
+    current = []
+    current_chars = 0
+    for piece in pieces:
+        if current and current_chars + len(piece) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current, current_chars = [], 0
+        current.append(piece)
+        current_chars += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+# Function to compute the output token cap of a word budget, with some headroom so the
+# model cannot run far past the requested length
+def max_tokens_for(word_budget):
+    return int(word_budget * TOKENS_PER_WORD * 1.5) + 64
+
+
+# Function to compute the summary length (in words) for a transcript and a summary percentage
+def summary_word_budget(transcript_text, summary_percentage):
+    concise_words = len(transcript_text.split()) * CONCISE_SUMMARY_RATIO
+    budget = int(concise_words * summary_percentage / 100)
+    return max(MIN_SUMMARY_WORDS, min(MAX_SUMMARY_WORDS, budget))
+
+
+# Function to build the single summarization prompt, with the length budget when there is one
+def build_summary_prompt(prompt, transcript_text, word_budget=None):
+    length = f" in approximately {word_budget} words" if word_budget else ""
+    return (
+        f"{prompt}\n"
+        f"Write the summary{length}, in a concise format.\n\n"
+        f"Here is the text to summarize:\n{transcript_text}"
+    )
+
+
+# Local stand-in for genai.GenerativeModel: answers with the first words of the text after
+# the prompt header, with a configurable time to first token and per-token delay, and
+# reports usage the same way the API does. Used for offline latency/token benchmarks.
+class StubModel:
+    def __init__(self, model_name="stub", first_token_latency=0.3, token_latency=0.01, chunk_tokens=8):
+        self.model_name = model_name
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.chunk_tokens = chunk_tokens
+        self.calls = 0
+
+    def _answer(self, prompt, generation_config):
+        max_tokens = None
+        if generation_config is not None:
+            max_tokens = (generation_config.get("max_output_tokens") if isinstance(generation_config, dict)
+                          else getattr(generation_config, "max_output_tokens", None))
+        header, _, body = prompt.rpartition("Here is the text to summarize:")
+        words = body.split()
+        requested = re.search(r"approximately (\d+) words", header)
+        limit = int(requested.group(1)) if requested else max(MIN_SUMMARY_WORDS, len(words) // 7)
+        if max_tokens:
+            limit = min(limit, int(max_tokens / TOKENS_PER_WORD))
+        return words[:limit]
+
+    def _chunks(self, prompt, generation_config):
+        self.calls += 1
+        words = self._answer(prompt, generation_config)
+        time.sleep(self.first_token_latency)
+        usage = SimpleNamespace(prompt_token_count=estimate_tokens(prompt), candidates_token_count=0)
+        for first in range(0, len(words), self.chunk_tokens):
+            piece = words[first:first + self.chunk_tokens]
+            time.sleep(self.token_latency * len(piece))
+            usage.candidates_token_count += int(len(piece) * TOKENS_PER_WORD)
+            yield SimpleNamespace(text=" ".join(piece) + " ", usage_metadata=usage)
+
+    def generate_content(self, prompt, stream=False, generation_config=None):
+        chunks = self._chunks(prompt, generation_config)
+        if stream:
+            return chunks
+        chunks = list(chunks)
+        usage = chunks[-1].usage_metadata if chunks else None
+        return SimpleNamespace(text="".join(chunk.text for chunk in chunks).strip(), usage_metadata=usage)
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls += 1
+        words = self._answer(prompt, generation_config)
+        await asyncio.sleep(self.first_token_latency + self.token_latency * len(words))
+        usage = SimpleNamespace(prompt_token_count=estimate_tokens(prompt),
+                                candidates_token_count=int(len(words) * TOKENS_PER_WORD))
+        return SimpleNamespace(text=" ".join(words), usage_metadata=usage)
+
+
+# Async context manager limiting the chunk requests of one map step: at most
+# max_concurrency in flight, started no faster than requests_per_minute
+class RateLimiter:
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+
+# Coroutine running another one with the context variables (trace, current span) of the
+# thread that scheduled it, so the spans recorded on the map loop join the caller's trace
+async def run_in_context(context, coroutine):
+    for variable, value in context.items():
+        variable.set(value)
+    return await coroutine
+
+
+# Token and latency counters of a summarization client
+class UsageStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.first_token_seconds = []
+        self.total_seconds = []
+
+    def record(self, prompt_tokens, output_tokens, first_token_seconds, total_seconds):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+            if first_token_seconds is not None:
+                self.first_token_seconds.append(first_token_seconds)
+            self.total_seconds.append(total_seconds)
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "first_token_seconds": self.first_token_seconds[-1] if self.first_token_seconds else None,
+            "total_seconds": sum(self.total_seconds),
+        }
+
+
+# Summarization client that keeps one model handle for the process and issues a single
+# streamed request per summary, with the length budget computed from the transcript.
+# Transcripts too long for one request are summarized map-reduce: the chunks concurrently,
+# then the partial summaries merged by the streamed request.
+class SummaryClient:
+    def __init__(self, model_name=DEFAULT_MODEL, backend=SUMMARY_BACKEND, model=None,
+                 single_call_tokens=SINGLE_CALL_TOKENS, chunk_tokens=CHUNK_TOKENS,
+                 max_concurrency=MAX_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE):
+        self.model_name = model_name
+        self.backend = backend
+        self._model = model
+        self._lock = threading.Lock()
+        self._loop = None
+        self.single_call_tokens = single_call_tokens
+        self.chunk_tokens = chunk_tokens
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.usage = UsageStats()
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                if self.backend == "stub":
+                    self._model = StubModel(self.model_name)
+                else:
+                    import google.generativeai as genai
+                    self._model = genai.GenerativeModel(self.model_name)
+            return self._model
+
+    def _record(self, full_prompt, output, usage, first_token_seconds, start):
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or estimate_tokens(full_prompt)
+        output_tokens = getattr(usage, "candidates_token_count", 0) or estimate_tokens(output)
+        self.usage.record(prompt_tokens, output_tokens, first_token_seconds, time.perf_counter() - start)
+
+    # Yield the response text piece by piece as it arrives, and record token usage
+    @instrument("gemini.generate")
+    def stream(self, full_prompt, max_output_tokens=None):
+        generation_config = {"max_output_tokens": max_output_tokens} if max_output_tokens else None
+        start = time.perf_counter()
+        first_token = None
+        output = []
+        usage = None
+        for chunk in self.model.generate_content(full_prompt, stream=True, generation_config=generation_config):
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            text = chunk.text
+            if not text:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            output.append(text)
+            yield text
+        self._record(full_prompt, "".join(output), usage, first_token, start)
+
+    # Run a coroutine on the client's event loop thread and return its result. The loop lives as
+    # long as the client: the model's async client is bound to the loop it first ran on, so a
+    # new loop per transcript (asyncio.run) would break every long transcript after the first.
+    def run_async(self, coroutine):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="gemini-map", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(run_in_context(contextvars.copy_context(), coroutine),
+                                                self._loop).result()
+
+    # Return the whole response text of one request, and record token usage
+    async def generate_async(self, full_prompt, max_output_tokens=None):
+        generation_config = {"max_output_tokens": max_output_tokens} if max_output_tokens else None
+        start = time.perf_counter()
+        with span("gemini.generate_chunk", bytes=len(full_prompt.encode("utf-8"))):
+            response = await self.model.generate_content_async(full_prompt, generation_config=generation_config)
+        text = response.text
+        self._record(full_prompt, text, getattr(response, "usage_metadata", None), None, start)
+        return text
+
+    # Summarize the chunks concurrently within the rate limit; returns the partial summaries in order
+    async def map_chunks(self, chunks, prompt):
+        limiter = RateLimiter(self.max_concurrency, self.requests_per_minute)
+
+        async def summarize_chunk(part, chunk):
+            word_budget = max(MIN_SUMMARY_WORDS, int(len(chunk.split()) * CONCISE_SUMMARY_RATIO))
+            part_prompt = f"{prompt}\n{PART_INSTRUCTION.format(part=part, parts=len(chunks))}"
+            async with limiter:
+                return await self.generate_async(build_summary_prompt(part_prompt, chunk, word_budget),
+                                                 max_tokens_for(word_budget))
+
+        return await asyncio.gather(*(summarize_chunk(part, chunk) for part, chunk in enumerate(chunks, 1)))
+
+    # Map step of a long transcript: summarize its chunks, and again the partial summaries
+    # while they are still too long for the merging request
+    async def map_transcript(self, transcript_text, prompt):
+        text = transcript_text
+        for _ in range(MAX_MAP_ROUNDS):
+            if not needs_map_reduce(text, self.single_call_tokens):
+                break
+            partial_summaries = await self.map_chunks(split_transcript(text, self.chunk_tokens), prompt)
+            text = "\n".join(summary.strip() for summary in partial_summaries)
+        return text
+
+    # Stream a summary of the transcript in approximately summary_percentage of a concise summary
+    def stream_summary(self, transcript_text, prompt, summary_percentage=None):
+        word_budget = summary_word_budget(transcript_text, summary_percentage) if summary_percentage else None
+        max_output_tokens = max_tokens_for(word_budget) if word_budget else None
+        if needs_map_reduce(transcript_text, self.single_call_tokens):
+            transcript_text = self.run_async(self.map_transcript(transcript_text, prompt))
+            prompt = f"{prompt}\n{MERGE_INSTRUCTION}"
+        yield from self.stream(build_summary_prompt(prompt, transcript_text, word_budget), max_output_tokens)
+
+    def summarize(self, transcript_text, prompt, summary_percentage=None):
+        return "".join(self.stream_summary(transcript_text, prompt, summary_percentage)).strip()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+# Function to get the shared summarization client of a model
+def get_summary_client(model_name=DEFAULT_MODEL):
+    with _clients_lock:
+        if model_name not in _clients:
+            _clients[model_name] = SummaryClient(model_name)
+        return _clients[model_name]
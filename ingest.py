@@ -0,0 +1,217 @@
+import json
+import os
+import subprocess
+import threading
+from profiler import file_measure, instrument
+
+FFMPEG = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE = os.getenv("FFPROBE_BINARY", "ffprobe")
+
+# Recognizers and Whisper work on 16 kHz mono 16-bit PCM
+TARGET_SAMPLE_RATE = 16000
+TARGET_CHANNELS = 1
+TARGET_CODEC = "pcm_s16le"
+
+# Prefer audio-only formats, smallest file first; fall back to the smallest muxed format
+AUDIO_ONLY_FORMAT = "bestaudio[vcodec=none]/bestaudio/best"
+SMALLEST_FIRST = ["+size", "+br", "+asr"]
+# Uploads are copied (and piped to ffmpeg) through one buffer of this size, override with UPLOAD_BUFFER_KB
+COPY_BUFFER_BYTES = int(os.getenv("UPLOAD_BUFFER_KB", "1024")) * 1024
+# Box types that can start an MP4/MOV (ISO base media) file
+ISO_MEDIA_BOXES = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot"}
+
+
+# Function to read the codec, sample rate and channel count of the first audio stream
+def probe_audio(path):
+    command = [
+        FFPROBE, "-v", "error", "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,sample_rate,channels",
+        "-show_entries", "format=format_name",
+        "-of", "json", path,
+    ]
+    output = subprocess.run(command, capture_output=True, check=True).stdout
+    info = json.loads(output or b"{}")
+    streams = info.get("streams") or [{}]
+    stream = streams[0]
+    return {
+        "codec": stream.get("codec_name"),
+        "sample_rate": int(stream.get("sample_rate") or 0),
+        "channels": int(stream.get("channels") or 0),
+        "format": info.get("format", {}).get("format_name", ""),
+    }
+
+
+# Function to check whether an audio stream is already 16 kHz mono 16-bit PCM
+def is_target_pcm(info, sample_rate=TARGET_SAMPLE_RATE):
+    return (info["codec"] == TARGET_CODEC and info["sample_rate"] == sample_rate
+            and info["channels"] == TARGET_CHANNELS)
+
+
+# Function to write the audio of any media file as a 16 kHz mono PCM WAV file.
+# Video streams are never decoded; audio that is already in the target format is
+# stream-copied instead of being transcoded.
+@instrument("ffmpeg", measure=lambda path, source, audio_filename, sample_rate=TARGET_SAMPLE_RATE:
+            file_measure(path, sample_rate))
+def decode_to_pcm_wav(source, audio_filename, sample_rate=TARGET_SAMPLE_RATE):
+    try:
+        suitable = is_target_pcm(probe_audio(source), sample_rate)
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+        suitable = False
+    if suitable:
+        codec_args = ["-c:a", "copy"]
+    else:
+        codec_args = ["-c:a", TARGET_CODEC, "-ac", str(TARGET_CHANNELS), "-ar", str(sample_rate)]
+    command = [FFMPEG, "-nostdin", "-loglevel", "error", "-y", "-i", source, "-vn", "-sn", "-dn",
+               *codec_args, "-f", "wav", audio_filename]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to extract audio from {source}: "
+                           f"{result.stderr.decode(errors='replace').strip()}")
+    return audio_filename
+
+
+# Function to read a file object block by block into one reused buffer. Each block is a view
+# of that buffer, valid until the next block is read.
+def iter_blocks(source, buffer_size=COPY_BUFFER_BYTES):
+    buffer = memoryview(bytearray(buffer_size))
+    readinto = getattr(source, "readinto", None)
+    while True:
+        if readinto is not None:
+            count = readinto(buffer)
+            block = buffer[:count]
+        else:
+            block = source.read(buffer_size)
+            count = len(block)
+        if not count:
+            return
+        yield block
+
+
+# Function to copy an uploaded file (any readable file object) to disk in fixed-size blocks,
+# so a multi-GB upload is never duplicated in memory. Returns the number of bytes written.
+def copy_upload(source, path, buffer_size=COPY_BUFFER_BYTES):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    written = 0
+    with open(path, "wb") as f:
+        for block in iter_blocks(source, buffer_size):
+            f.write(block)
+            written += len(block)
+    return written
+
+
+# Function to check whether ffmpeg can decode an upload read from a pipe. MP4/MOV files can
+# only be decoded in order when their index (the moov box) comes before the media data
+# ("fast start"), so their top-level boxes are walked; other containers are streamable.
+# Uploads that cannot seek are assumed to be streamable.
+def pipe_decodable(source):
+    if not hasattr(source, "seek"):
+        return True
+    try:
+        source.seek(0)
+        if source.read(8)[4:8] not in ISO_MEDIA_BOXES:
+            return True
+        position = 0
+        while True:
+            source.seek(position)
+            header = source.read(16)
+            if len(header) < 8:
+                return False
+            size, kind = int.from_bytes(header[:4], "big"), header[4:8]
+            if kind == b"moov":
+                return True
+            if kind == b"mdat":
+                return False
+            if size == 1:
+                size = int.from_bytes(header[8:16], "big")
+            if size < 8:  # 0: the box runs to the end of the file
+                return False
+            position += size
+    finally:
+        source.seek(0)
+
+
+# Function to write an upload to disk and extract its audio at the same time: every block
+# written to copy_path is also piped to ffmpeg, so decoding runs while the copy is being
+# written instead of after it. Uploads that cannot be decoded from a pipe (MP4/MOV with the
+# index at the end) are copied first and decoded once from the copy; if the pipe decode
+# still fails, the copy is decoded again and the error keeps both ffmpeg messages.
+@instrument("ffmpeg.stream", measure=lambda path, source, audio_filename, copy_path,
+            sample_rate=TARGET_SAMPLE_RATE, **kwargs: file_measure(path, sample_rate))
+def decode_upload_to_pcm_wav(source, audio_filename, copy_path, sample_rate=TARGET_SAMPLE_RATE,
+                             buffer_size=COPY_BUFFER_BYTES):
+    if not pipe_decodable(source):
+        copy_upload(source, copy_path, buffer_size)
+        return decode_to_pcm_wav(copy_path, audio_filename, sample_rate)
+    command = [FFMPEG, "-loglevel", "error", "-y", "-i", "pipe:0", "-vn", "-sn", "-dn",
+               "-c:a", TARGET_CODEC, "-ac", str(TARGET_CHANNELS), "-ar", str(sample_rate),
+               "-f", "wav", audio_filename]
+    try:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        copy_upload(source, copy_path, buffer_size)
+        return decode_to_pcm_wav(copy_path, audio_filename, sample_rate)
+    # Drain stderr on a thread, so a chatty ffmpeg can never block on a full pipe
+    errors = []
+    reader = threading.Thread(target=lambda: errors.append(process.stderr.read()), daemon=True)
+    reader.start()
+
+    if hasattr(source, "seek"):
+        source.seek(0)
+    piping = True
+    try:
+        with open(copy_path, "wb") as copy:
+            for block in iter_blocks(source, buffer_size):
+                copy.write(block)
+                if piping:
+                    try:
+                        process.stdin.write(block)
+                    except BrokenPipeError:
+                        piping = False  # ffmpeg gave up; finish the copy for the fallback
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = process.wait()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        reader.join()
+
+    # A successful pipe decode leaves more than a bare 44-byte WAV header
+    if returncode == 0 and os.path.exists(audio_filename) and os.path.getsize(audio_filename) > 44:
+        return audio_filename
+    try:
+        return decode_to_pcm_wav(copy_path, audio_filename, sample_rate)
+    except RuntimeError as e:
+        pipe_error = b"".join(errors).decode(errors="replace").strip() or f"exit code {returncode}"
+        raise RuntimeError(f"{e} (decoding the upload stream failed first: {pipe_error})") from e
+
+
+# Function to download only the smallest audio-only format of a video and return its path
+@instrument("yt-dlp", measure=lambda path, *args, **kwargs: file_measure(path))
+def download_audio_only(video_url, output_dir="."):
+    import yt_dlp as youtube_dl
+    ydl_opts = {
+        'format': AUDIO_ONLY_FORMAT,
+        'format_sort': SMALLEST_FIRST,
+        'outtmpl': os.path.join(output_dir, 'downloaded_audio.%(ext)s'),
+        'quiet': True,
+        'noplaylist': True,
+    }
+    with youtube_dl.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(video_url, download=True)
+        return ydl.prepare_filename(info)
+
+
+# Function to download the audio of a video and decode it straight to 16 kHz mono PCM
+def download_audio_as_pcm(video_url, audio_filename, output_dir="."):
+    downloaded = download_audio_only(video_url, output_dir)
+    try:
+        decode_to_pcm_wav(downloaded, audio_filename)
+    finally:
+        if os.path.exists(downloaded):
+            os.remove(downloaded)
+    return audio_filename
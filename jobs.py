@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+
+# Location of the job queue database, shared by the Streamlit apps and the workers
+JOBS_PATH = os.getenv("VIDEO_SUMMARY_JOBS_PATH", os.path.join(".cache", "jobs.sqlite3"))
+
+# A running job whose worker has not reported progress for this long is handed out again,
+# or failed once it has been tried MAX_ATTEMPTS times
+STALE_AFTER = int(os.getenv("VIDEO_SUMMARY_JOB_STALE_AFTER", "900"))  # seconds
+MAX_ATTEMPTS = 3
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+# Persistent job queue in SQLite. Jobs survive UI restarts, and workers in other
+# processes claim them atomically, so a job is only ever run by one worker at a time.
+class JobQueue:
+    def __init__(self, path=JOBS_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " stage TEXT,"
+                " progress REAL NOT NULL DEFAULT 0,"
+                " result TEXT,"
+                " error TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " worker TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    # Open a short-lived autocommit connection (claim() manages its own transaction)
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # Add a job to the queue and return its ID
+    def submit(self, kind, payload):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, stage, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUED, "queued", now, now),
+            )
+        return job_id
+
+    # Return a job as a dict (payload and result decoded), or None if it does not exist
+    def get(self, job_id):
+        with self._connect() as conn:
+            self._fail_abandoned(conn, time.time())
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    # Fail stale running jobs that have used up their attempts; nobody would ever claim them again
+    def _fail_abandoned(self, conn, now):
+        conn.execute(
+            "UPDATE jobs SET status = ?, stage = ?, error = ?, updated_at = ?"
+            " WHERE status = ? AND updated_at < ? AND attempts >= ?",
+            (FAILED, "failed", f"Worker stopped responding ({MAX_ATTEMPTS} attempts)", now,
+             RUNNING, now - STALE_AFTER, MAX_ATTEMPTS),
+        )
+
+    # Atomically take the oldest queued job (or a stale running one) for a worker
+    def claim(self, worker):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._fail_abandoned(conn, now)
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ?"
+                    " OR (status = ? AND updated_at < ? AND attempts < ?)"
+                    " ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING, now - STALE_AFTER, MAX_ATTEMPTS),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = ?, stage = ?, worker = ?, attempts = attempts + 1,"
+                    " updated_at = ? WHERE id = ?",
+                    (RUNNING, "starting", worker, now, row["id"]),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        job = self._to_dict(row)
+        job["status"] = RUNNING
+        return job
+
+    # Record the current stage and progress (0..1) of a running job; doubles as a heartbeat.
+    # Updates from a worker the job was taken away from (see claim) are ignored; the
+    # methods return whether the job still belonged to the worker.
+    def update_progress(self, job_id, worker, stage, progress):
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET stage = ?, progress = ?, updated_at = ? WHERE id = ? AND worker = ?",
+                (stage, progress, time.time(), job_id, worker),
+            ).rowcount > 0
+
+    def complete(self, job_id, worker, result):
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, progress = 1, result = ?, updated_at = ?"
+                " WHERE id = ? AND worker = ?",
+                (DONE, "done", json.dumps(result), time.time(), job_id, worker),
+            ).rowcount > 0
+
+    def fail(self, job_id, worker, error):
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, error = ?, updated_at = ? WHERE id = ? AND worker = ?",
+                (FAILED, "failed", str(error), time.time(), job_id, worker),
+            ).rowcount > 0
+
+    # Count jobs per status, for monitoring
+    def counts(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def _to_dict(self, row):
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
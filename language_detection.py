@@ -0,0 +1,129 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from profiler import span
+
+# Number of samples voted over, characters per sample, and the seed that makes both the
+# sampling and langdetect's own randomness reproducible
+SAMPLE_COUNT = 12
+SAMPLE_CHARS = 300
+SEED = 0
+# YouTube track codes that do not reduce to their primary subtag (langdetect/googletrans names)
+CODE_ALIASES = {"zh-hans": "zh-cn", "zh-hant": "zh-tw", "zh-cn": "zh-cn", "zh-tw": "zh-tw", "iw": "he"}
+
+
+# Function to turn a track language code ("en-US", "zh-Hans") into the code used for translation
+def normalize_code(code):
+    code = code.lower()
+    return CODE_ALIASES.get(code, code.split("-")[0])
+
+
+# Function to cut a text into pieces to sample from: its lines (transcript segments), or
+# runs of words when it is a single block of text such as a summary
+def text_pieces(text, piece_chars=SAMPLE_CHARS):
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(lines) > 1:
+        return lines
+    words = text.split()
+    pieces = []
+    current = []
+    length = 0
+    for word in words:
+        current.append(word)
+        length += len(word) + 1
+        if length >= piece_chars:
+            pieces.append(" ".join(current))
+            current, length = [], 0
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+# Function to draw a stratified sample: the pieces are divided into `count` equal strata and
+# each sample starts at a random piece of its stratum and extends to about sample_chars
+def stratified_sample(pieces, count=SAMPLE_COUNT, sample_chars=SAMPLE_CHARS, seed=SEED):
+    if not pieces:
+        return []
+    rng = random.Random(seed)
+    count = min(count, len(pieces))
+    samples = []
+    for stratum in range(count):
+        first = stratum * len(pieces) // count
+        last = max(first + 1, (stratum + 1) * len(pieces) // count)
+        index = rng.randrange(first, last)
+        sample = []
+        length = 0
+        while index < len(pieces) and length < sample_chars:
+            sample.append(pieces[index])
+            length += len(pieces[index]) + 1
+            index += 1
+        samples.append(" ".join(sample))
+    return samples
+
+
+# Language identifier that votes over a bounded sample of the text instead of running
+# langdetect on all of it, and trusts the transcript track's language code when there is one
+class LanguageIdentifier:
+    def __init__(self, sample_count=SAMPLE_COUNT, sample_chars=SAMPLE_CHARS, seed=SEED):
+        self.sample_count = sample_count
+        self.sample_chars = sample_chars
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.short_circuits = 0
+        self.samples = 0
+        self.seconds = 0.0
+        self.last_seconds = 0.0
+
+    def _record(self, seconds, samples, short_circuit):
+        with self._lock:
+            self.calls += 1
+            self.short_circuits += short_circuit
+            self.samples += samples
+            self.seconds += seconds
+            self.last_seconds = seconds
+
+    # Return the language code of the text (e.g. "en"); when known_code, the language_code
+    # of the transcript track, is given it is used without looking at the text
+    def identify(self, text, known_code=None):
+        start = time.perf_counter()
+        if known_code:
+            self._record(time.perf_counter() - start, 0, True)
+            return normalize_code(known_code)
+
+        from langdetect import DetectorFactory, detect_langs
+        from langdetect.lang_detect_exception import LangDetectException
+        DetectorFactory.seed = self.seed
+
+        samples = stratified_sample(text_pieces(text, self.sample_chars), self.sample_count,
+                                    self.sample_chars, self.seed)
+        votes = defaultdict(float)
+        with span("langid", bytes=sum(len(sample.encode("utf-8")) for sample in samples)):
+            for sample in samples:
+                try:
+                    for language in detect_langs(sample):
+                        votes[language.lang] += language.prob
+                except LangDetectException:
+                    continue
+        self._record(time.perf_counter() - start, len(samples), False)
+        if not votes:
+            raise LangDetectException(0, "No features in text.")
+        return max(votes, key=votes.get)
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "short_circuits": self.short_circuits,
+            "samples": self.samples,
+            "seconds": self.seconds,
+            "last_seconds": self.last_seconds,
+        }
+
+
+identifier = LanguageIdentifier()
+
+
+# Function to detect the language of a text with the shared identifier
+def detect_language(text, known_code=None):
+    return identifier.identify(text, known_code)
@@ -1,72 +1,72 @@
 import streamlit as st
-from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound
-from google.generativeai import GenerativeModel
-from langdetect import detect
-from googletrans import Translator, LANGUAGES
-
-# Initialize Google Translator
-translator = Translator()
+from cache import get_cache, make_key, media_digest, video_id_from_url
+from gemini_client import DEFAULT_MODEL, get_summary_client
+from transcripts import PREFERRED_LANGUAGES, fetch_best_transcript
+from translation import get_translation_engine
+from language_detection import detect_language as identify_language
+from profiler import instrument, show_debug_panel, trace
 
 # Function to detect language of text
+@instrument()
 def detect_language(text):
     try:
-        return detect(text)
+        return identify_language(text)
     except Exception as e:
         st.warning(f"Language detection failed: {str(e)}")
         return 'en'  # Default to English if detection fails
 
 # Function to translate summary to target language
+@instrument()
 def translate_summary(summary, target_lang):
     source_lang = detect_language(summary)
-    
-    if source_lang in LANGUAGES and target_lang.lower() in LANGUAGES:
-        try:
-            translated = translator.translate(summary, src=source_lang, dest=target_lang.lower())
-            return translated.text
-        except Exception as e:
-            st.warning(f"Translation failed: {str(e)}")
-            return summary
-    else:
-        st.warning("Invalid language code detected. Translation could not be performed.")
+    try:
+        return get_translation_engine().translate(summary, target_lang, src=source_lang)
+    except Exception as e:
+        st.warning(f"Translation failed: {str(e)}")
         return summary
 
-# Function to extract transcript from YouTube video
+# Function to extract transcript from YouTube video, fetching only its best track
+@instrument()
 def extract_transcript_details(youtube_video_url):
     try:
-        video_id = youtube_video_url.split("v=")[1]
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-        
-        # Initialize an empty string to store concatenated transcript text
-        transcript_text = ""
-
-        # Iterate over available transcripts (languages)
-        for transcript in transcript_list:
-            try:
-                # Fetch transcript for each language
-                segments = transcript.fetch()
-                # Concatenate text from each segment
-                transcript_text += " ".join([segment['text'] for segment in segments])
-            except NoTranscriptFound:
-                continue
-        
-        # Return concatenated transcript text
-        return transcript_text
+        segments = fetch_best_transcript(video_id_from_url(youtube_video_url))
+        # Return the transcript text, one segment per line
+        return segments.text() if segments else ""
     
     except Exception as e:
         st.error(f"Error extracting transcript: {str(e)}")
         return None
 
+# Instruction sent with every transcript
+summary_prompt = "Summarize the following YouTube video transcript."
+
 # Function to generate summary using Gemini Pro
+@instrument()
 def generate_summary(transcript_text):
-    # Initialize the model (dummy implementation)
-    model = GenerativeModel("gemini-pro")
-    full_prompt = (
-        f"Here is the text to summarize:\n{transcript_text}\n\n\n\n"
-        f"Please summarize the above text to approximately  in a concise format."
-    )
-    response = model.generate_content(full_prompt)
+    return get_summary_client().summarize(transcript_text, summary_prompt)
 
-    return response.text
+# Function to extract the transcript, reusing a cached copy for the same video
+def cached_transcript_details(youtube_video_url):
+    video_id = video_id_from_url(youtube_video_url)
+    key = make_key(video_id, "transcript", source="youtube_transcript_api", track="best",
+                   languages=list(PREFERRED_LANGUAGES), format="text")
+    transcript_text = get_cache().get(key) if video_id else None
+    if transcript_text is None:
+        transcript_text = extract_transcript_details(youtube_video_url)
+        if transcript_text:
+            get_cache().set(key, transcript_text)
+    return transcript_text
+
+# Function to stream a summary as it is generated, or yield a cached one of the same transcript
+def stream_summary(transcript_text):
+    key = make_key(media_digest(transcript_text.encode("utf-8")), "summary", model=DEFAULT_MODEL,
+                   backend=get_summary_client().backend, strategy="single-pass", prompt=summary_prompt)
+    return get_cache().get_or_stream(key, lambda: get_summary_client().stream_summary(transcript_text,
+                                                                                      summary_prompt))
+
+# Function to translate a summary; the engine reuses cached translations sentence by sentence
+def cached_translation(summary, target_lang):
+    return translate_summary(summary, target_lang)
 
 # Function to handle feedback submission
 def submit_feedback(video_id, feedback_text):
@@ -85,37 +85,41 @@ target_language = st.selectbox(
     "Select Target Language for Summary:",
     ["English", "telugu", "hindi", "tamil"]
 )
+show_profile = st.sidebar.checkbox("Show profiling panel")
 
 if st.button("Get Summary"):
     if youtube_link:
-        try:
-            transcript_text = extract_transcript_details(youtube_link)
-            if not transcript_text:
-                st.warning("No transcription details found for the provided link.")
-            else:
-                # Generate summary based on the extracted transcript
-                summary = generate_summary(transcript_text)
-                
-                st.subheader("Summary:")
-                st.write(summary)
-                
-                # Translate summary if target language is selected
-                if target_language != "English":
-                    translated_summary = translate_summary(summary, target_language.lower())
-                    st.subheader(f"Translated Summary ({target_language}):")
-                    st.write(translated_summary)
-                
-                # Feedback section
-                st.subheader("Feedback:")
-                feedback_text = st.text_area("Provide your feedback on the summary:")
-                if st.button("Submit Feedback"):
-                    if youtube_link:
-                        video_id = youtube_link.split("v=")[1]
-                        submit_feedback(video_id, feedback_text)
-                    else:
-                        st.warning("No video link provided. Feedback cannot be submitted.")
-                    
-        except Exception as e:
-            st.error(f"Error: {str(e)}")
+        with trace("summary") as request_trace:
+            st.session_state["trace"] = request_trace
+            try:
+                transcript_text = cached_transcript_details(youtube_link)
+                if not transcript_text:
+                    st.warning("No transcription details found for the provided link.")
+                else:
+                    # Generate summary based on the extracted transcript
+                    st.subheader("Summary:")
+                    summary = st.write_stream(stream_summary(transcript_text))
+
+                    # Translate summary if target language is selected
+                    if target_language != "English":
+                        translated_summary = cached_translation(summary, target_language.lower())
+                        st.subheader(f"Translated Summary ({target_language}):")
+                        st.write(translated_summary)
+
+                    # Feedback section
+                    st.subheader("Feedback:")
+                    feedback_text = st.text_area("Provide your feedback on the summary:")
+                    if st.button("Submit Feedback"):
+                        if youtube_link:
+                            video_id = youtube_link.split("v=")[1]
+                            submit_feedback(video_id, feedback_text)
+                        else:
+                            st.warning("No video link provided. Feedback cannot be submitted.")
+
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
     else:
         st.warning("Please enter a YouTube video link.")
+
+if show_profile:
+    show_debug_panel(st.session_state.get("trace"))
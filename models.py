@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Default memory budget for all loaded models (in MB), override with MODEL_MEMORY_BUDGET_MB
+DEFAULT_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "4096"))
+
+DISTILBART_CHECKPOINT = "sshleifer/distilbart-cnn-12-6"
+
+# DistilBART inference backends and the registry entries that load them: the PyTorch
+# checkpoint, the same weights with int8 dynamically quantized linear layers, and an ONNX
+# Runtime export (needs optimum[onnxruntime])
+BART_BACKENDS = {
+    "pytorch": "distilbart",
+    "int8": "distilbart-int8",
+    "onnx": "distilbart-onnx",
+}
+DEFAULT_BART_BACKEND = os.getenv("BART_BACKEND", "pytorch")
+
+
+# Function to list the DistilBART backends whose packages are installed
+def available_bart_backends():
+    import importlib.util
+    return [backend for backend in BART_BACKENDS
+            if backend != "onnx" or importlib.util.find_spec("optimum") is not None]
+
+
+# Function to estimate the in-memory size of a model in bytes. The state dict covers
+# parameters, buffers and the packed int8 weights of dynamically quantized layers.
+def estimate_model_bytes(model):
+    def size(value):
+        if isinstance(value, (tuple, list)):
+            return sum(size(item) for item in value)
+        if hasattr(value, "numel") and hasattr(value, "element_size"):
+            return value.numel() * value.element_size()
+        return 0
+
+    state_dict = getattr(model, "state_dict", None)
+    if state_dict is None:
+        return 0
+    return sum(size(value) for value in state_dict().values())
+
+
+# Function to load the DistilBART tokenizer and model pair
+def load_distilbart(checkpoint=DISTILBART_CHECKPOINT):
+    from transformers import BartTokenizer, BartForConditionalGeneration
+    tokenizer = BartTokenizer.from_pretrained(checkpoint)
+    model = BartForConditionalGeneration.from_pretrained(checkpoint)
+    model.eval()
+    return (tokenizer, model), estimate_model_bytes(model)
+
+
+# Function to load DistilBART with its Linear layers dynamically quantized to int8
+# (weights stored as int8, activations quantized on the fly; CPU only)
+def load_distilbart_int8(checkpoint=DISTILBART_CHECKPOINT):
+    import torch
+    from transformers import BartTokenizer, BartForConditionalGeneration
+    tokenizer = BartTokenizer.from_pretrained(checkpoint)
+    model = BartForConditionalGeneration.from_pretrained(checkpoint)
+    model.eval()
+    model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return (tokenizer, model), estimate_model_bytes(model)
+
+
+# Function to load DistilBART exported to ONNX Runtime (encoder and decoder with past
+# key/values). Needs the optional optimum[onnxruntime] package; the export runs on first load.
+def load_distilbart_onnx(checkpoint=DISTILBART_CHECKPOINT):
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise ImportError("The ONNX backend needs optimum[onnxruntime]: pip install optimum[onnxruntime]") from e
+    from transformers import BartTokenizer
+    tokenizer = BartTokenizer.from_pretrained(checkpoint)
+    model = ORTModelForSeq2SeqLM.from_pretrained(checkpoint, export=True, use_cache=True)
+    model_dir = str(getattr(model, "model_save_dir", ""))
+    size = sum(os.path.getsize(os.path.join(model_dir, name)) for name in os.listdir(model_dir)
+               if name.endswith(".onnx") or name.endswith(".onnx_data")) if os.path.isdir(model_dir) else 0
+    return (tokenizer, model), size
+
+
+# Function to load a Whisper model of the given size ("tiny", "base", "small", ...)
+def load_whisper(size="base"):
+    import whisper
+    model = whisper.load_model(size)
+    return model, estimate_model_bytes(model)
+
+
+# Process-wide registry that loads models lazily, keeps them under a memory budget
+# (least recently used models are evicted first) and counts loads, hits and misses
+class ModelRegistry:
+    def __init__(self, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._loaders = {}
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "load_seconds": {}}
+
+    # Register a loader for a model name; the loader returns (model, size_in_bytes)
+    def register(self, name, loader):
+        self._loaders[name] = loader
+
+    def _key_lock(self, name):
+        with self._lock:
+            return self._key_locks.setdefault(name, threading.Lock())
+
+    # Return the model for a name, loading it on first use
+    def get(self, name):
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                self.stats["hits"] += 1
+                return self._models[name]
+
+        # Only one thread loads a given model; the others wait and then hit the cache
+        with self._key_lock(name):
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    self.stats["hits"] += 1
+                    return self._models[name]
+                self.stats["misses"] += 1
+            if name not in self._loaders:
+                raise KeyError(f"No loader registered for model '{name}'")
+
+            start = time.perf_counter()
+            model, size = self._loaders[name]()
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.stats["load_seconds"][name] = elapsed
+                self._models[name] = model
+                self._sizes[name] = size
+                self._evict()
+            return model
+
+    # Evict least recently used models until the total size fits the budget;
+    # the most recently used model is always kept, even if it alone exceeds the budget
+    def _evict(self):
+        while self.memory_used() > self.memory_budget and len(self._models) > 1:
+            oldest, _ = self._models.popitem(last=False)
+            del self._sizes[oldest]
+            self.stats["evictions"] += 1
+
+    # Drop a model from the registry so it can be garbage collected
+    def unload(self, name):
+        with self._lock:
+            self._models.pop(name, None)
+            self._sizes.pop(name, None)
+
+    # Load the given models ahead of the first request
+    def warm_up(self, names):
+        for name in names:
+            self.get(name)
+
+    def memory_used(self):
+        return sum(self._sizes.values())
+
+    # Size in bytes reported by the loader of a loaded model (None if it is not loaded)
+    def size_of(self, name):
+        with self._lock:
+            return self._sizes.get(name)
+
+    def loaded(self):
+        with self._lock:
+            return list(self._models)
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+
+registry = ModelRegistry()
+registry.register("distilbart", load_distilbart)
+registry.register("distilbart-int8", load_distilbart_int8)
+registry.register("distilbart-onnx", load_distilbart_onnx)
+for _size in ("tiny", "base", "small", "medium"):
+    registry.register(f"whisper-{_size}", lambda size=_size: load_whisper(size))
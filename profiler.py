@@ -0,0 +1,287 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# When set, the stage metrics are written here after every traced request:
+# Prometheus text format for a .prom file, JSON otherwise
+PROFILE_PATH = os.getenv("VIDEO_SUMMARY_PROFILE_PATH")
+METRIC_PREFIX = "video_summary"
+
+
+# Function to get the peak resident set size of the process in bytes (None if unknown)
+def peak_rss_bytes():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss)
+
+
+# One timed stage of a request, with the bytes and the seconds of audio it processed
+class Span:
+    def __init__(self, name, parent=None, bytes=0, audio_seconds=0.0):
+        self.name = name
+        self.parent = parent
+        self.bytes = bytes
+        self.audio_seconds = audio_seconds
+        self.started_at = time.time()
+        self.seconds = 0.0
+        self.peak_rss = None
+        self.error = None
+
+    # Add to the bytes / audio seconds processed, when they are only known inside the stage
+    def add(self, bytes=0, audio_seconds=0.0):
+        self.bytes += bytes
+        self.audio_seconds += audio_seconds
+
+    # Real-time factor: processing seconds per second of audio (below 1 is faster than real time)
+    @property
+    def rtf(self):
+        return self.seconds / self.audio_seconds if self.audio_seconds else None
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "parent": self.parent,
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "bytes": self.bytes,
+            "audio_seconds": self.audio_seconds,
+            "rtf": self.rtf,
+            "peak_rss_bytes": self.peak_rss,
+            "error": self.error,
+        }
+
+
+# The spans of one request (one button press, one background job)
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.seconds = None
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def as_dict(self):
+        with self._lock:
+            spans = [span.as_dict() for span in self.spans]
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "spans": spans,
+        }
+
+
+# Totals of one stage over the life of the process
+class StageStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.bytes = 0
+        self.audio_seconds = 0.0
+
+    def record(self, span):
+        self.calls += 1
+        self.errors += span.error is not None
+        self.seconds += span.seconds
+        self.max_seconds = max(self.max_seconds, span.seconds)
+        self.bytes += span.bytes
+        self.audio_seconds += span.audio_seconds
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "seconds": self.seconds,
+            "max_seconds": self.max_seconds,
+            "bytes": self.bytes,
+            "audio_seconds": self.audio_seconds,
+            "rtf": self.seconds / self.audio_seconds if self.audio_seconds else None,
+        }
+
+
+# Process-wide per-stage metrics, exportable as JSON or Prometheus text
+class Profiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = OrderedDict()
+
+    def record(self, span):
+        with self._lock:
+            self._stages.setdefault(span.name, StageStats()).record(span)
+
+    def stages(self):
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self._stages.items()}
+
+    def as_dict(self):
+        return {"peak_rss_bytes": peak_rss_bytes(), "stages": self.stages()}
+
+    def prometheus_text(self):
+        stages = self.stages()
+        metrics = [
+            ("stage_calls_total", "counter", "Number of times each pipeline stage ran", "calls"),
+            ("stage_errors_total", "counter", "Number of failed runs of each pipeline stage", "errors"),
+            ("stage_seconds_total", "counter", "Seconds spent in each pipeline stage", "seconds"),
+            ("stage_max_seconds", "gauge", "Longest single run of each pipeline stage", "max_seconds"),
+            ("stage_bytes_total", "counter", "Bytes processed by each pipeline stage", "bytes"),
+            ("stage_audio_seconds_total", "counter", "Seconds of audio processed by each pipeline stage",
+             "audio_seconds"),
+        ]
+        lines = []
+        for metric, kind, description, field in metrics:
+            lines.append(f"# HELP {METRIC_PREFIX}_{metric} {description}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{metric} {kind}")
+            for name, stats in stages.items():
+                lines.append(f'{METRIC_PREFIX}_{metric}{{stage="{name}"}} {stats[field]}')
+        peak = peak_rss_bytes()
+        if peak is not None:
+            lines.append(f"# HELP {METRIC_PREFIX}_peak_rss_bytes Peak resident set size of the process")
+            lines.append(f"# TYPE {METRIC_PREFIX}_peak_rss_bytes gauge")
+            lines.append(f"{METRIC_PREFIX}_peak_rss_bytes {peak}")
+        return "\n".join(lines) + "\n"
+
+    # Write the metrics to a file (.prom: Prometheus text, otherwise JSON), replacing it atomically
+    def export(self, path):
+        text = self.prometheus_text() if path.endswith(".prom") else json.dumps(self.as_dict(), indent=2)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+profiler = Profiler()
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _finish(span, start):
+    span.seconds = time.perf_counter() - start
+    span.peak_rss = peak_rss_bytes()
+    profiler.record(span)
+    current_trace = _current_trace.get()
+    if current_trace is not None:
+        current_trace.add(span)
+
+
+# Context manager timing one stage; yields the Span so the stage can add bytes/audio seconds
+@contextmanager
+def span(name, bytes=0, audio_seconds=0.0):
+    parent = _current_span.get()
+    current = Span(name, parent.name if parent else None, bytes, audio_seconds)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish(current, start)
+
+
+# Context manager collecting the spans of one request; the trace can be shown in the debug panel
+@contextmanager
+def trace(name):
+    current = Trace(name)
+    token = _current_trace.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - start
+        _current_trace.reset(token)
+        if PROFILE_PATH:
+            profiler.export(PROFILE_PATH)
+
+
+# Decorator running a function inside a span. measure(result, *args, **kwargs) may return
+# {"bytes": ..., "audio_seconds": ...} for the call. Generator functions are timed from the
+# first to the last item.
+def instrument(name=None, measure=None):
+    def decorator(function):
+        stage = name or function.__qualname__
+
+        if inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def generator_wrapper(*args, **kwargs):
+                parent = _current_span.get()
+                current = Span(stage, parent.name if parent else None)
+                start = time.perf_counter()
+                try:
+                    yield from function(*args, **kwargs)
+                except BaseException as e:
+                    current.error = type(e).__name__
+                    raise
+                finally:
+                    _finish(current, start)
+            return generator_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(stage) as current:
+                result = function(*args, **kwargs)
+                if measure is not None:
+                    current.add(**measure(result, *args, **kwargs))
+                return result
+        return wrapper
+    return decorator
+
+
+# Function to measure a file that a stage wrote or read: its size in bytes and, for 16-bit
+# mono PCM WAVs at sample_rate, its duration
+def file_measure(path, sample_rate=None):
+    try:
+        size = os.path.getsize(path)
+    except (OSError, TypeError):
+        return {}
+    return {"bytes": size, "audio_seconds": size / (2 * sample_rate) if sample_rate else 0.0}
+
+
+# Function to show a trace and the process-wide stage metrics in a Streamlit expander
+def show_debug_panel(request_trace=None, container=None):
+    import streamlit as st
+    container = container or st.sidebar
+    with container.expander("Profiling"):
+        if request_trace is not None:
+            st.caption(f"Last request: {request_trace.seconds or 0:.2f} s")
+            st.dataframe([
+                {"stage": span.name, "parent": span.parent or "", "seconds": round(span.seconds, 3),
+                 "bytes": span.bytes, "audio s": round(span.audio_seconds, 1),
+                 "RTF": round(span.rtf, 3) if span.rtf else None, "error": span.error or ""}
+                for span in request_trace.spans
+            ])
+        peak = peak_rss_bytes()
+        if peak is not None:
+            st.caption(f"Peak RSS: {peak / 2**20:.0f} MB")
+        st.json(profiler.stages(), expanded=False)
+        st.download_button("Download JSON", json.dumps(profiler.as_dict(), indent=2), "profile.json")
+        st.download_button("Download Prometheus metrics", profiler.prometheus_text(), "profile.prom")
@@ -1,98 +1,31 @@
 import streamlit as st
-from dotenv import load_dotenv
-import os
-import google.generativeai as genai
-from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound
 import base64
-from googletrans import Translator
-from langdetect import detect
-import googleapiclient.discovery
-
-load_dotenv()  # Load environment variables
-
-# Configure API keys
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-youtube_api_key = os.getenv("YOUTUBE_API_KEY")
-
-prompt = """You are a YouTube video summarizer. You will take the transcript text
-and summarize the entire video, providing the important points in a concise format. """
-
-translator = Translator()
-
-# Function to detect language of text
-def detect_language(text):
-
-    return detect(text)
-
-# Function to translate text to English
-def translate_to_english(text, source_lang):
-    translated = translator.translate(text, src=source_lang, dest='en')
-    return translated.text
-
-# Function to translate summary to target language
-def translate_summary(summary, target_lang):
-    source=detect_language(summary)
-    translated = translator.translate(summary, src=source, dest=target_lang)
-    return translated.text
+import time
+from jobs import JobQueue, DONE, FAILED
+from profiler import instrument, show_debug_panel, trace
+from transcript_pipeline import (
+    prompt,
+    detect_language,
+    cached_transcript_segments,
+    stream_summary,
+    translate_summary_many,
+    cached_video_details,
+)
 
-# Function to extract transcript from YouTube video for all available languages
+# Function to extract the best transcript track of a YouTube video as timestamped segments
+@instrument()
 def extract_transcript_details(youtube_video_url):
     try:
-        video_id = youtube_video_url.split("v=")[1]
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-        
-        # Initialize an empty string to store concatenated transcript text
-        transcript_text = ""
-
-        # Iterate over available transcripts (languages)
-        for transcript in transcript_list:
-            try:
-                # Fetch transcript for each language
-                segments = transcript.fetch()
-                # Concatenate text from each segment
-                transcript_text += " ".join([segment['text'] for segment in segments])
-            except NoTranscriptFound:
-                continue
-        
-        # Return concatenated transcript text and video id
-        return transcript_text, video_id
-    
+        return cached_transcript_segments(youtube_video_url)
     except Exception as e:
         st.error(f"Error extracting transcript: {str(e)}")
         return None, None
 
-# Function to generate summary using Gemini Pro
-def generate_summary(transcript_text, prompt, summary_percentage):
-    
-    # Initialize the model
-    model = genai.GenerativeModel("gemini-pro")
-    
-    # Generate the summary
-    summary = model.generate_content(prompt+transcript_text)
-    target_summary_length = int(len(summary.text) * (summary_percentage / 100))
-
-    full_prompt = (
-        f"Here is the text to summarize:\n{summary.text}\n\n"
-        f"Please summarize the above text to approximately {target_summary_length} in a concised format."
-    )
-    response = model.generate_content(full_prompt)
-
-    return response.text
-
-
 # Function to get video details using YouTube Data API
+@instrument()
 def get_video_details(video_id):
     try:
-        youtube = googleapiclient.discovery.build("youtube", "v3", developerKey=youtube_api_key)
-        request = youtube.videos().list(part="snippet", id=video_id)
-        response = request.execute()
-
-        if response["items"]:
-            title = response["items"][0]["snippet"]["title"]
-            description = response["items"][0]["snippet"]["description"]
-            return title, description
-        else:
-            return None, None
+        return cached_video_details(video_id)
     except Exception as e:
         st.error(f"Error fetching video details: {str(e)}")
         return None, None
@@ -178,6 +111,49 @@ def add_custom_css():
         unsafe_allow_html=True
     )
 
+# Function to display the summary next to the video thumbnail, with a download link
+def show_summary(video_id, video_title, summary, summary_percentage):
+    col1, col_space, col2 = st.columns([1, 0.1, 1])
+    
+    with col1:
+        st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", use_column_width=True, caption=video_title)
+    
+    with col2:
+        b64_summary = base64.b64encode(summary.encode()).decode()
+        st.markdown(f'<h2 class="summary-title">Summary for "{video_title}":</h2>', unsafe_allow_html=True)
+        st.markdown(f'<p><strong>Summary Percentage:</strong> {summary_percentage}%</p>', unsafe_allow_html=True)
+    
+    st.markdown(
+            """
+            <div style='background-color: #F8FBFE; padding: 10px; border-radius: 5px; color: black; border: 1px solid black; box-shadow: 0 0 10px rgba(0, 0, 0, 0.1); transition: box-shadow 0.3s;'>
+                <div class="button-container">
+                    <a class="download-button" href="data:text/plain;base64,{b64_summary}" download="{video_title}.txt">Download</a>
+                </div>
+                <p>{summary}</p>
+            </div>
+            """.format(b64_summary=b64_summary, video_title=video_title, summary=summary),
+            unsafe_allow_html=True
+    )
+
+# Seconds between two polls of a background job's status
+JOB_POLL_INTERVAL = 2
+
+# Function to show the status of a background job, polling until it has finished
+def show_job_status(job_id):
+    job = JobQueue().get(job_id)
+    if job is None:
+        st.warning(f"Unknown job '{job_id}'.")
+    elif job["status"] == DONE:
+        result = job["result"]
+        show_summary(result["video_id"], result["video_title"], result["summary"],
+                     job["payload"]["summary_percentage"])
+    elif job["status"] == FAILED:
+        st.error(f"Error: {job['error']}")
+    else:
+        st.progress(job["progress"], text=f"Job {job_id[:8]}: {job['stage']}...")
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
 # Apply custom CSS
 add_custom_css()
 
@@ -185,61 +161,69 @@ add_custom_css()
 st.markdown('<h1 class="title">YouTube Video Summarizer</h1>', unsafe_allow_html=True)
 
 youtube_link = st.text_input("Enter YouTube Video Link:")
-target_language = st.selectbox(
-    "Select Target Language for Summary:",
-    ["English", "French", "German", "Spanish", "Telugu", "Hindi", "Malayalam", "Tamil", "Kannada"]
-)
+languages = ["English", "French", "German", "Spanish", "Telugu", "Hindi", "Malayalam", "Tamil", "Kannada"]
+target_language = st.selectbox("Select Target Language for Summary:", languages)
+other_languages = st.multiselect("Also show the summary in:",
+                                 [language for language in languages if language != target_language])
 summary_percentage = st.slider("Select Summary Length (%) :", 1, 100, 50, 1)
+run_in_background = st.checkbox("Run in background worker (keeps running if the page is refreshed)")
+show_profile = st.sidebar.checkbox("Show profiling panel")
 
 if st.button("Get Summary"):
-    if youtube_link:
-        try:
-            transcript_text, video_id = extract_transcript_details(youtube_link)
-            if not transcript_text:
-                st.warning("No transcription details found for the provided link.")
-            else:
-                video_title, _ = get_video_details(video_id)
-                
-                if transcript_text:
-                    # Detect the language of the transcript
-                    try:
-                        source_lang = detect_language(transcript_text)
-                    except Exception as e:
-                        st.warning(f"Language detection failed: {str(e)}")
-                        source_lang = 'en'  # Default to English if detection fails
-                    
-                    # Generate summary based on the detected language (default to English)
-                    summary = generate_summary(transcript_text, prompt, summary_percentage)
-                    
-                    # Translate summary to the selected target language if not English
-                    if target_language != source_lang:
+    if youtube_link and run_in_background:
+        # The job ID goes into the URL so a refreshed page picks the job up again
+        st.query_params["job"] = JobQueue().submit("youtube_summary", {
+            "url": youtube_link,
+            "summary_percentage": summary_percentage,
+            "target_language": target_language,
+        })
+    elif youtube_link:
+        with trace("summary") as request_trace:
+            st.session_state["trace"] = request_trace
+            try:
+                segments, video_id = extract_transcript_details(youtube_link)
+                transcript_text = segments.text() if segments else ""
+                if not transcript_text:
+                    st.warning("No transcription details found for the provided link.")
+                else:
+                    video_title, _ = get_video_details(video_id)
+
+                    if transcript_text:
+                        # Detect the language of the transcript (known from the track in most cases)
+                        try:
+                            source_lang = detect_language(transcript_text, segments.language_code)
+                        except Exception as e:
+                            st.warning(f"Language detection failed: {str(e)}")
+                            source_lang = 'en'  # Default to English if detection fails
+                        st.caption(f"Transcript language: {source_lang}")
+
+                        # Generate summary based on the detected language (default to English),
+                        # showing the text as it arrives and replacing it with the final layout
+                        live_summary = st.empty()
+                        with live_summary.container():
+                            summary = st.write_stream(stream_summary(video_id, transcript_text, prompt,
+                                                                     summary_percentage))
+                        live_summary.empty()
+
+                        # Translate summary to the selected target languages (in one pass) if not English
+                        translations = {}
                         try:
-                            summary = translate_summary(summary, target_language.lower())
+                            translations = translate_summary_many(summary, [target_language] + other_languages)
+                            summary = translations[target_language]
                         except Exception as e:
                             st.warning(f"Translation failed: {str(e)}")
-                    
-                    col1, col_space, col2 = st.columns([1, 0.1, 1])
-                    
-                    with col1:
-                        st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", use_column_width=True, caption=video_title)
-                    
-                    with col2:
-                        b64_summary = base64.b64encode(summary.encode()).decode()
-                        st.markdown(f'<h2 class="summary-title">Summary for "{video_title}":</h2>', unsafe_allow_html=True)
-                        st.markdown(f'<p><strong>Summary Percentage:</strong> {summary_percentage}%</p>', unsafe_allow_html=True)
-                        
-                    st.markdown(
-                            """
-                            <div style='background-color: #F8FBFE; padding: 10px; border-radius: 5px; color: black; border: 1px solid black; box-shadow: 0 0 10px rgba(0, 0, 0, 0.1); transition: box-shadow 0.3s;'>
-                                <div class="button-container">
-                                    <a class="download-button" href="data:text/plain;base64,{b64_summary}" download="{video_title}.txt">Download</a>
-                                </div>
-                                <p>{summary}</p>
-                            </div>
-                            """.format(b64_summary=b64_summary, video_title=video_title, summary=summary),
-                            unsafe_allow_html=True
-                    )
-        except Exception as e:
-            st.error(f"Error: {str(e)}")
+
+                        show_summary(video_id, video_title, summary, summary_percentage)
+                        if translations and other_languages:
+                            for tab, language in zip(st.tabs(other_languages), other_languages):
+                                tab.write(translations[language])
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
     else:
         st.warning("Please enter a YouTube video link.")
+
+if "job" in st.query_params:
+    show_job_status(st.query_params["job"])
+
+if show_profile:
+    show_debug_panel(st.session_state.get("trace"))
@@ -1,27 +1,86 @@
 import streamlit as st
-import whisper
+from models import registry
 from pytube import YouTube
+from workspace import Workspace
+from whisper_engine import MODEL_TIERS, iter_transcribe_batched, transcribe_batched
+from cache import get_cache, make_key, media_digest, video_id_from_url
+from profiler import file_measure, instrument, show_debug_panel, trace
 
-# Download YouTube video
+# Download the smallest audio-only stream of a YouTube video (Whisper resamples it to 16 kHz itself)
+@instrument("pytube.download", measure=lambda filename, *args, **kwargs: file_measure(filename))
 def download_video(url, filename='video.mp4'):
     yt = YouTube(url)
-    stream = yt.streams.filter(only_audio=True).first()
+    stream = yt.streams.filter(only_audio=True).order_by('abr').asc().first()
     stream.download(filename=filename)
     return filename
 
-# Transcribe video using Whisper
-def transcribe_video(filename):
-    model = whisper.load_model("base")
-    result = model.transcribe(filename)
+# Transcribe video using Whisper: speech segments are packed into 30-second windows and
+# decoded in batches on all CPU threads
+@instrument()
+def transcribe_video(filename, model_size="base"):
+    result = transcribe_batched(filename, model_size=model_size)
     return result["text"]
 
+# Function to build the cache key of a video's transcript
+def transcription_key(url, model_size="base"):
+    source_id = video_id_from_url(url) or media_digest(url.encode("utf-8"))
+    return make_key(source_id, "transcript", model=f"whisper-{model_size}", engine="batched")
+
+# Download and transcribe a video, reusing a cached transcript for the same video
+def cached_transcription(url, model_size="base"):
+    key = transcription_key(url, model_size)
+    transcription = get_cache().get(key)
+    if transcription is None:
+        # Each request downloads into its own scratch directory, so sessions never clobber each other
+        with Workspace() as workspace:
+            video_file = download_video(url, workspace.file('video.mp4'))
+            transcription = transcribe_video(video_file, model_size)
+        if transcription:
+            get_cache().set(key, transcription)
+    return transcription
+
+# Download and transcribe a video, yielding the transcript so far after every decoded batch
+# of 30-second windows (a cached transcript is yielded whole)
+def progressive_transcription(url, model_size="base"):
+    key = transcription_key(url, model_size)
+    transcription = get_cache().get(key)
+    if transcription is not None:
+        yield transcription
+        return
+    texts = []
+    with Workspace() as workspace:
+        video_file = download_video(url, workspace.file('video.mp4'))
+        for segment in iter_transcribe_batched(video_file, model_size=model_size):
+            texts.append(segment["text"])
+            yield " ".join(texts)
+    if texts:
+        get_cache().set(key, " ".join(texts))
+
 # Streamlit app
 st.title('YouTube Video Transcription')
+
+tier = st.sidebar.selectbox('Model tier', list(MODEL_TIERS), index=1,
+                            format_func=lambda name: f"{name} ({MODEL_TIERS[name]})")
+model_size = MODEL_TIERS[tier]
+
+# Load the Whisper model once per process, before the first request
+with st.spinner('Loading models...'):
+    registry.warm_up([f"whisper-{model_size}"])
+
 video_url = st.text_input('Enter YouTube video URL')
+progressive = st.sidebar.checkbox('Show the transcript while transcribing', value=True)
+show_profile = st.sidebar.checkbox('Show profiling panel')
 
 if st.button('Transcribe'):
-    with st.spinner('Downloading and transcribing video...'):
-        video_file = download_video(video_url)
-        transcription = transcribe_video(video_file)
     st.write("Transcript:")
-    st.write(transcription)
+    transcript_box = st.empty()
+    with st.spinner('Downloading and transcribing video...'), trace('transcription') as request_trace:
+        st.session_state['trace'] = request_trace
+        if progressive:
+            for transcription in progressive_transcription(video_url, model_size):
+                transcript_box.write(transcription)
+        else:
+            transcript_box.write(cached_transcription(video_url, model_size))
+
+if show_profile:
+    show_debug_panel(st.session_state.get('trace'))
@@ -0,0 +1,197 @@
+import contextvars
+import random
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# How many requests each recognition backend is allowed to have in flight
+BACKEND_CONCURRENCY = {
+    "google": 4,
+    "local": 8,
+}
+DEFAULT_CONCURRENCY = 4
+
+
+# Raised by a recognizer when a request may succeed if it is retried
+class TransientRecognitionError(Exception):
+    pass
+
+
+# Errors that are worth retrying: network problems, timeouts and rate limits
+TRANSIENT_ERRORS = (TransientRecognitionError, TimeoutError, socket.timeout, ConnectionError)
+
+
+# Function to add speech_recognition's RequestError (API unreachable / quota) to the transient errors
+def transient_errors():
+    try:
+        import speech_recognition as sr
+        return TRANSIENT_ERRORS + (sr.RequestError,)
+    except ImportError:
+        return TRANSIENT_ERRORS
+
+
+# Counters for tuning the scheduler: throughput, queue depth and per-chunk latency
+class SchedulerStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = None
+        self.finished_at = None
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.latencies = []
+        self.last_error = None
+
+    def record(self, **changes):
+        with self._lock:
+            for name, value in changes.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def set_queue_depth(self, depth):
+        with self._lock:
+            self.queue_depth = depth
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def set_error(self, error):
+        with self._lock:
+            self.last_error = f"{type(error).__name__}: {error}"
+
+    def add_latency(self, seconds):
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def throughput(self):
+        end = self.finished_at or time.perf_counter()
+        if self.started_at is None or end <= self.started_at:
+            return 0.0
+        return self.completed / (end - self.started_at)
+
+    def latency_percentile(self, percentile):
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return 0.0
+        index = min(len(latencies) - 1, int(round(percentile / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def as_dict(self):
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "throughput_chunks_per_s": self.throughput(),
+            "latency_p50_s": self.latency_percentile(50),
+            "latency_p95_s": self.latency_percentile(95),
+            "latency_max_s": self.latency_percentile(100),
+            "last_error": self.last_error,
+        }
+
+
+# Scheduler that runs a recognizer over a stream of chunks with a concurrency limit per
+# backend, retries transient failures with exponential backoff and jitter, and yields
+# (index, text) pairs in input order as soon as a contiguous prefix of chunks is done.
+# Chunks are pulled from the input lazily, so at most `concurrency` are held in memory.
+class RecognitionScheduler:
+    def __init__(self, recognize, backend="google", concurrency=None, max_retries=3,
+                 backoff=0.5, max_backoff=8.0, timeout=30.0, stats=None):
+        self.recognize = recognize
+        self.backend = backend
+        self.concurrency = concurrency or BACKEND_CONCURRENCY.get(backend, DEFAULT_CONCURRENCY)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.retryable = transient_errors()
+        self.stats = stats or SchedulerStats()
+
+    # Recognize one chunk, retrying transient errors; a chunk that keeps failing, or fails
+    # with any other error, yields "" so one bad chunk cannot abort the whole transcription
+    def _run_chunk(self, chunk):
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                text = self.recognize(chunk)
+                self.stats.add_latency(time.perf_counter() - start)
+                self.stats.record(completed=1)
+                return text
+            except self.retryable as e:
+                if attempt == self.max_retries:
+                    self.stats.set_error(e)
+                    break
+                self.stats.record(retries=1)
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+            except Exception as e:
+                self.stats.set_error(e)
+                break
+        self.stats.add_latency(time.perf_counter() - start)
+        self.stats.record(failed=1)
+        return ""
+
+    # Yield (index, text) for every chunk, in order
+    def run(self, chunks):
+        self.stats.started_at = time.perf_counter()
+        chunks = iter(chunks)
+        next_index = 0
+        next_to_yield = 0
+        done = {}
+        in_flight = {}
+        deadlines = deque()
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        timed_out = False
+        try:
+            exhausted = False
+            while True:
+                # Keep the backend busy, but never more than `concurrency` chunks ahead
+                while not exhausted and len(in_flight) < self.concurrency:
+                    try:
+                        chunk = next(chunks)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    # Run in a copy of the caller's context, so profiling spans land in its trace
+                    future = executor.submit(contextvars.copy_context().run, self._run_chunk, chunk)
+                    in_flight[future] = next_index
+                    deadlines.append((time.perf_counter() + self.timeout * (self.max_retries + 1), future))
+                    next_index += 1
+                self.stats.set_queue_depth(len(in_flight))
+                if not in_flight:
+                    break
+
+                finished, _ = wait(list(in_flight), timeout=self._time_left(deadlines), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done[in_flight.pop(future)] = future.result()
+
+                # Give up on chunks that exceeded their deadline; their thread finishes in the background
+                now = time.perf_counter()
+                while deadlines and (deadlines[0][1] not in in_flight or deadlines[0][0] <= now):
+                    deadline, future = deadlines.popleft()
+                    if future in in_flight:
+                        done[in_flight.pop(future)] = ""
+                        self.stats.record(timeouts=1, failed=1)
+                        timed_out = True
+
+                while next_to_yield in done:
+                    yield next_to_yield, done.pop(next_to_yield)
+                    next_to_yield += 1
+        finally:
+            self.stats.finished_at = time.perf_counter()
+            executor.shutdown(wait=not timed_out, cancel_futures=True)
+
+    def _time_left(self, deadlines):
+        if not deadlines:
+            return None
+        return max(0.0, deadlines[0][0] - time.perf_counter())
+
+    # Run all chunks and return the texts in order
+    def run_all(self, chunks):
+        return [text for _, text in self.run(chunks)]
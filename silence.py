@@ -0,0 +1,121 @@
+import numpy as np
+from pydub.utils import db_to_float
+
+
+# Function to view the raw samples of an AudioSegment as a NumPy array (no copy)
+def segment_samples(audio_segment):
+    dtype = {1: np.int8, 2: np.int16, 4: np.int32}[audio_segment.sample_width]
+    return np.frombuffer(audio_segment.raw_data, dtype=dtype)
+
+
+# Function to compute the running energy (sum of squared samples) at every millisecond
+# boundary. Samples are squared block by block so long recordings never need a full
+# squared copy in memory; int64 is exact for 8/16-bit audio.
+def millisecond_energy_prefix(audio_segment, block_ms=60000):
+    samples = segment_samples(audio_segment)
+    seg_len = len(audio_segment)
+    frames_per_ms = audio_segment.frame_rate / 1000.0
+    accumulator = np.int64 if audio_segment.sample_width <= 2 else np.float64
+
+    # Millisecond positions map to sample offsets the same way AudioSegment slicing does
+    bounds = (np.arange(seg_len + 1) * frames_per_ms).astype(np.int64) * audio_segment.channels
+    bounds = np.minimum(bounds, len(samples))
+
+    prefix = np.zeros(seg_len + 1, dtype=accumulator)
+    total = 0
+    for first in range(0, seg_len, block_ms):
+        last = min(first + block_ms, seg_len)
+        lo, hi = bounds[first], bounds[last]
+        block_prefix = np.zeros(hi - lo + 1, dtype=accumulator)
+        np.cumsum(samples[lo:hi].astype(accumulator) ** 2, out=block_prefix[1:])
+        prefix[first + 1:last + 1] = block_prefix[bounds[first + 1:last + 1] - lo] + total
+        total = prefix[last]
+    return prefix
+
+
+# Function to compute the RMS of every window_ms window starting at the given
+# millisecond offsets in one vectorized pass (same values as AudioSegment[i:i+n].rms)
+def window_rms(audio_segment, starts_ms, window_ms, energy_prefix=None):
+    if energy_prefix is None:
+        energy_prefix = millisecond_energy_prefix(audio_segment)
+    seg_len = len(audio_segment)
+    frames_per_ms = audio_segment.frame_rate / 1000.0
+    channels = audio_segment.channels
+
+    ends_ms = np.minimum(starts_ms + window_ms, seg_len)
+    sums = (energy_prefix[ends_ms] - energy_prefix[starts_ms]).astype(np.float64)
+    # Slices running past the data are padded with silence by pydub: they count, but add nothing
+    counts = ((ends_ms * frames_per_ms).astype(np.int64) - (starts_ms * frames_per_ms).astype(np.int64)) * channels
+
+    return np.floor(np.sqrt(np.where(counts > 0, sums / np.maximum(counts, 1), 0.0)))
+
+
+# Function to find silent ranges, equivalent to pydub.silence.detect_silence
+def detect_silence(audio_segment, min_silence_len=1000, silence_thresh=-16, seek_step=1):
+    seg_len = len(audio_segment)
+    if seg_len < min_silence_len:
+        return []
+
+    silence_thresh = db_to_float(silence_thresh) * audio_segment.max_possible_amplitude
+
+    last_slice_start = seg_len - min_silence_len
+    slice_starts = np.arange(0, last_slice_start + 1, seek_step, dtype=np.int64)
+    if last_slice_start % seek_step:
+        slice_starts = np.append(slice_starts, last_slice_start)
+
+    rms = window_rms(audio_segment, slice_starts, min_silence_len)
+    silence_starts = slice_starts[rms <= silence_thresh]
+    if not len(silence_starts):
+        return []
+
+    # A new range begins where consecutive silent windows are neither continuous nor overlapping
+    gaps = np.diff(silence_starts)
+    breaks = np.nonzero((gaps != seek_step) & (gaps > min_silence_len))[0]
+    range_starts = np.concatenate(([silence_starts[0]], silence_starts[breaks + 1]))
+    range_ends = np.concatenate((silence_starts[breaks], [silence_starts[-1]])) + min_silence_len
+    return [[int(start), int(end)] for start, end in zip(range_starts, range_ends)]
+
+
+# Function to find nonsilent ranges, equivalent to pydub.silence.detect_nonsilent
+def detect_nonsilent(audio_segment, min_silence_len=1000, silence_thresh=-16, seek_step=1):
+    silent_ranges = detect_silence(audio_segment, min_silence_len, silence_thresh, seek_step)
+    len_seg = len(audio_segment)
+
+    if not silent_ranges:
+        return [[0, len_seg]]
+    if silent_ranges[0][0] == 0 and silent_ranges[0][1] == len_seg:
+        return []
+
+    prev_end_i = 0
+    nonsilent_ranges = []
+    for start_i, end_i in silent_ranges:
+        nonsilent_ranges.append([prev_end_i, start_i])
+        prev_end_i = end_i
+    if end_i != len_seg:
+        nonsilent_ranges.append([prev_end_i, len_seg])
+    if nonsilent_ranges[0] == [0, 0]:
+        nonsilent_ranges.pop(0)
+    return nonsilent_ranges
+
+
+# Function to split audio on silence, equivalent to pydub.silence.split_on_silence
+def split_on_silence(audio_segment, min_silence_len=1000, silence_thresh=-16, keep_silence=100,
+                     seek_step=1):
+    if isinstance(keep_silence, bool):
+        keep_silence = len(audio_segment) if keep_silence else 0
+
+    output_ranges = [
+        [start - keep_silence, end + keep_silence]
+        for start, end in detect_nonsilent(audio_segment, min_silence_len, silence_thresh, seek_step)
+    ]
+    for range_i, range_ii in zip(output_ranges, output_ranges[1:]):
+        last_end = range_i[1]
+        next_start = range_ii[0]
+        if next_start < last_end:
+            range_i[1] = (last_end + next_start) // 2
+            range_ii[0] = range_i[1]
+
+    return [
+        audio_segment[max(start, 0):min(end, len(audio_segment))]
+        for start, end in output_ranges
+    ]
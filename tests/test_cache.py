@@ -0,0 +1,118 @@
+import json
+import sqlite3
+
+import pytest
+
+import cache as cache_module
+from cache import ResultCache, make_key
+
+
+# Clock replacing the cache module's time, advanced by hand
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+# Function to get the size of a value as the cache stores it
+def encoded_size(value):
+    return len(json.dumps(value).encode("utf-8"))
+
+
+# Function to add up the entry sizes the slow way, to check the running total
+def summed_size(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+
+def test_running_total_follows_writes(path, clock):
+    cache = ResultCache(path)
+    cache.set("a", "x" * 10)
+    cache.set_many([("b", "y" * 20), ("c", ["z"] * 5)])
+    assert cache.size() == encoded_size("x" * 10) + encoded_size("y" * 20) + encoded_size(["z"] * 5)
+    # Overwriting a key with a value of a different size replaces its size in the total
+    cache.set("a", "x" * 100)
+    cache.set("b", "y")
+    assert cache.get("a") == "x" * 100
+    assert cache.size() == encoded_size("x" * 100) + encoded_size("y") + encoded_size(["z"] * 5)
+    cache.delete("c")
+    assert cache.size() == summed_size(path) == encoded_size("x" * 100) + encoded_size("y")
+
+
+def test_total_is_shared_and_survives_reopening(path, clock):
+    ResultCache(path).set("a", "x" * 10)
+    other = ResultCache(path)
+    other.set("b", "y" * 10)
+    assert ResultCache(path).size() == summed_size(path) == 2 * encoded_size("x" * 10)
+
+
+def test_expired_get(path, clock):
+    cache = ResultCache(path, default_ttl=60)
+    cache.set("short", "value")
+    cache.set("forever", "value", ttl=0)
+    clock.now += 59
+    assert cache.get("short") == "value"
+    clock.now += 2
+    assert cache.get("short") is None
+    assert cache.get("forever") == "value"
+    # The expired entry is gone, and so is its size
+    assert cache.size() == summed_size(path) == encoded_size("value")
+
+
+def test_expired_entries_are_dropped_on_write(path, clock):
+    cache = ResultCache(path, default_ttl=60)
+    cache.set("old", "value")
+    clock.now += 61
+    cache.set("new", "value")
+    assert cache.size() == encoded_size("value")
+
+
+def test_eviction_drops_least_recently_used(path, clock):
+    value = "x" * 98  # 100 bytes once encoded
+    cache = ResultCache(path, max_bytes=300)
+    for key in ("a", "b", "c"):
+        cache.set(key, value)
+        clock.now += 1
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") == value
+    clock.now += 1
+    cache.set("d", value)
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in ("a", "c", "d")] == [value] * 3
+    assert cache.size() == 300
+
+
+def test_get_or_compute_computes_once(path, clock):
+    cache = ResultCache(path)
+    calls = []
+    compute = lambda: calls.append(1) or "summary"  # noqa: E731
+    assert cache.get_or_compute("k", compute) == "summary"
+    assert cache.get_or_compute("k", compute) == "summary"
+    assert len(calls) == 1
+
+
+def test_get_or_stream_caches_the_joined_pieces(path, clock):
+    cache = ResultCache(path)
+    assert list(cache.get_or_stream("k", lambda: iter(["Hello ", "world "]))) == ["Hello ", "world "]
+    assert list(cache.get_or_stream("k", lambda: iter(["other"]))) == ["Hello world"]
+
+
+def test_make_key_depends_on_every_parameter():
+    key = make_key("video", "summary", model="m", max_length=150)
+    assert key == make_key("video", "summary", max_length=150, model="m")
+    assert key != make_key("video", "summary", model="m", max_length=100)
+    assert key.startswith("summary:video:")
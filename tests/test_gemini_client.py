@@ -0,0 +1,84 @@
+import asyncio
+
+import gemini_client
+from gemini_client import CHARS_PER_TOKEN, StubModel, SummaryClient, needs_map_reduce, split_transcript
+from profiler import trace
+
+
+# Function to build a transcript of numbered words, one segment per line
+def transcript(lines=200, words_per_line=12):
+    return "\n".join(" ".join(f"w{line}x{word}" for word in range(words_per_line)) for line in range(lines))
+
+
+# Stub model whose async client, like the gRPC one, only works on the loop it first ran on
+class LoopBoundModel(StubModel):
+    def __init__(self):
+        super().__init__(first_token_latency=0, token_latency=0)
+        self.loop = None
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        loop = asyncio.get_running_loop()
+        self.loop = self.loop or loop
+        if loop is not self.loop:
+            raise RuntimeError("attached to a different loop")
+        return await super().generate_content_async(prompt, generation_config)
+
+
+# Function to create a stub client that summarizes transcript() map-reduce, in one map round
+def stub_client(model=None):
+    return SummaryClient(backend="stub", model=model or StubModel(first_token_latency=0, token_latency=0),
+                         single_call_tokens=1500, chunk_tokens=1000, requests_per_minute=0)
+
+
+def test_split_transcript_keeps_words_in_order_within_the_chunk_size():
+    text = transcript()
+    chunks = split_transcript(text, chunk_tokens=200)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 200 * CHARS_PER_TOKEN for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+    # Chunks end on segment boundaries
+    assert all(chunk.splitlines()[-1].endswith("x11") for chunk in chunks)
+
+
+def test_split_transcript_cuts_long_lines_between_words():
+    line = " ".join(f"word{i}" for i in range(1000))
+    chunks = split_transcript(line, chunk_tokens=50)
+    assert all(len(chunk) <= 50 * CHARS_PER_TOKEN for chunk in chunks)
+    assert " ".join(chunks).split() == line.split()
+
+
+def test_needs_map_reduce():
+    assert not needs_map_reduce("x" * 400, single_call_tokens=100)
+    assert needs_map_reduce("x" * 404, single_call_tokens=100)
+
+
+def test_short_transcript_is_one_request():
+    client = stub_client()
+    summary = client.summarize(transcript(lines=10), "Summarize.")
+    assert client.model.calls == 1
+    assert summary.split()[0] == "w0x0"
+
+
+def test_long_transcript_is_summarized_map_reduce():
+    client = stub_client()
+    text = transcript()
+    chunks = split_transcript(text, client.chunk_tokens)
+    with trace("summary") as current:
+        summary = client.summarize(text, "Summarize.")
+    # One request per chunk, then the streamed merge of the partial summaries (in order)
+    assert client.model.calls == len(chunks) + 1
+    assert client.usage.requests == len(chunks) + 1
+    assert summary.split()[0] == "w0x0"
+    names = [span.name for span in current.spans]
+    assert names.count("gemini.generate_chunk") == len(chunks)
+
+
+def test_map_steps_share_one_event_loop():
+    client = stub_client(LoopBoundModel())
+    for _ in range(3):
+        assert client.summarize(transcript(), "Summarize.")
+    assert client.model.calls > 3
+
+
+def test_get_summary_client_is_shared():
+    assert gemini_client.get_summary_client("shared-test") is gemini_client.get_summary_client("shared-test")
@@ -0,0 +1,87 @@
+import io
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+import pytest
+
+import ingest
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which(ingest.FFMPEG) is None, reason="ffmpeg is not installed")
+
+
+# Function to build one ISO base media box
+def box(kind, payload=b""):
+    return (8 + len(payload)).to_bytes(4, "big") + kind + payload
+
+
+# Function to write a tone as a WAV file in memory
+def tone_wav(seconds=2, sample_rate=44100, channels=2):
+    t = np.arange(seconds * sample_rate) / sample_rate
+    samples = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(np.repeat(samples, channels).tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+def test_pipe_decodable_needs_moov_before_mdat():
+    ftyp = box(b"ftyp", b"isom\0\0\2\0isomiso2")
+    assert ingest.pipe_decodable(io.BytesIO(ftyp + box(b"moov", b"x" * 32) + box(b"mdat", b"y" * 64)))
+    assert not ingest.pipe_decodable(io.BytesIO(ftyp + box(b"mdat", b"y" * 64) + box(b"moov", b"x" * 32)))
+    assert not ingest.pipe_decodable(io.BytesIO(ftyp + box(b"free")))
+
+
+def test_pipe_decodable_other_containers():
+    upload = tone_wav()
+    upload.read(100)
+    assert ingest.pipe_decodable(upload)
+    assert upload.tell() == 0
+    assert ingest.pipe_decodable(io.BytesIO(b"\x1aE\xdf\xa3" + b"\0" * 64))  # Matroska / WebM
+
+
+# Function to read the format and the duration of a WAV file
+def wav_info(path):
+    with wave.open(path, "rb") as f:
+        return f.getframerate(), f.getnchannels(), f.getsampwidth(), f.getnframes() / f.getframerate()
+
+
+@needs_ffmpeg
+def test_decode_upload_to_pcm_wav(tmp_path):
+    audio_filename = str(tmp_path / "audio.wav")
+    copy_path = tmp_path / "upload.wav"
+    ingest.decode_upload_to_pcm_wav(tone_wav(), audio_filename, str(copy_path), buffer_size=4096)
+    sample_rate, channels, width, seconds = wav_info(audio_filename)
+    assert (sample_rate, channels, width) == (16000, 1, 2)
+    assert seconds == pytest.approx(2, abs=0.05)
+    assert copy_path.read_bytes() == tone_wav().getvalue()
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("faststart", [True, False])
+def test_decode_upload_mp4(tmp_path, faststart):
+    source = tmp_path / "source.wav"
+    source.write_bytes(tone_wav().getvalue())
+    video = tmp_path / "video.mp4"
+    movflags = ["-movflags", "+faststart"] if faststart else []
+    subprocess.run([ingest.FFMPEG, "-loglevel", "error", "-y", "-i", str(source), "-c:a", "aac", *movflags,
+                    str(video)], check=True)
+    with open(video, "rb") as upload:
+        assert ingest.pipe_decodable(upload) == faststart
+        audio_filename = str(tmp_path / "audio.wav")
+        ingest.decode_upload_to_pcm_wav(upload, audio_filename, str(tmp_path / "upload.mp4"))
+    sample_rate, channels, _, seconds = wav_info(audio_filename)
+    assert (sample_rate, channels) == (16000, 1)
+    assert seconds == pytest.approx(2, abs=0.1)
+
+
+@needs_ffmpeg
+def test_decode_upload_error_keeps_ffmpeg_message(tmp_path):
+    with pytest.raises(RuntimeError, match="decoding the upload stream failed first: .+"):
+        ingest.decode_upload_to_pcm_wav(io.BytesIO(b"not a media file" * 100), str(tmp_path / "audio.wav"),
+                                        str(tmp_path / "upload.bin"))
@@ -0,0 +1,43 @@
+import os
+
+import jobs
+from jobs import DONE, FAILED, RUNNING, JobQueue
+
+
+def make_queue(tmp_path):
+    return JobQueue(path=os.path.join(tmp_path, "jobs.sqlite3"))
+
+
+def test_only_the_owning_worker_can_finish_a_reclaimed_job(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("video", {"url": "u"})
+    assert queue.claim("first")["id"] == job_id
+    monkeypatch.setattr(jobs, "STALE_AFTER", -1)  # every running job counts as stale
+    assert queue.claim("second")["id"] == job_id
+
+    assert not queue.update_progress(job_id, "first", "transcribe", 0.3)
+    assert not queue.complete(job_id, "first", {"summary": "old"})
+    assert queue.complete(job_id, "second", {"summary": "new"})
+    assert queue.get(job_id)["result"] == {"summary": "new"}
+    assert queue.get(job_id)["status"] == DONE
+
+
+def test_heartbeat_keeps_a_job_from_being_reclaimed(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("video", {})
+    queue.claim("first")
+    assert queue.update_progress(job_id, "first", "transcribe (3 chunks)", 0.3)
+    assert queue.claim("second") is None
+    assert queue.get(job_id)["status"] == RUNNING
+
+
+def test_stale_job_out_of_attempts_is_failed(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("video", {})
+    monkeypatch.setattr(jobs, "STALE_AFTER", -1)
+    for attempt in range(jobs.MAX_ATTEMPTS):
+        assert queue.claim(f"worker-{attempt}")["id"] == job_id
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert "stopped responding" in job["error"]
+    assert queue.claim("another") is None
@@ -0,0 +1,110 @@
+import random
+import threading
+import time
+
+from scheduler import RecognitionScheduler, TransientRecognitionError
+
+
+# Fake recognizer: answers "chunk <n>" after a random delay, like a network call
+def slow_echo(seed=0, max_delay=0.02):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def recognize(chunk):
+        with lock:
+            delay = rng.uniform(0, max_delay)
+        time.sleep(delay)
+        return f"chunk {chunk}"
+    return recognize
+
+
+def test_results_are_yielded_in_input_order():
+    scheduler = RecognitionScheduler(slow_echo(), backend="local", concurrency=8, backoff=0.001)
+    results = list(scheduler.run(range(50)))
+    assert results == [(i, f"chunk {i}") for i in range(50)]
+    assert scheduler.stats.completed == 50
+    assert scheduler.stats.failed == 0
+
+
+def test_concurrency_limit_is_respected():
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+    echo = slow_echo()
+
+    def recognize(chunk):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        try:
+            return echo(chunk)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    scheduler = RecognitionScheduler(recognize, backend="local", concurrency=4, backoff=0.001)
+    assert len(scheduler.run_all(range(40))) == 40
+    assert 1 < peak[0] <= 4
+    assert scheduler.stats.max_queue_depth <= 4
+
+
+def test_transient_errors_are_retried():
+    failures = {}
+
+    def flaky(chunk):
+        failures[chunk] = failures.get(chunk, 0) + 1
+        if failures[chunk] <= 2:
+            raise TransientRecognitionError("simulated 503")
+        return f"chunk {chunk}"
+
+    scheduler = RecognitionScheduler(flaky, backend="local", concurrency=4, max_retries=3, backoff=0.001)
+    assert scheduler.run_all(range(10)) == [f"chunk {i}" for i in range(10)]
+    assert scheduler.stats.retries == 20
+    assert scheduler.stats.failed == 0
+
+
+def test_chunk_failing_every_retry_yields_empty_text():
+    def recognize(chunk):
+        if chunk == 3:
+            raise TransientRecognitionError("always down")
+        return f"chunk {chunk}"
+
+    scheduler = RecognitionScheduler(recognize, backend="local", concurrency=2, max_retries=2, backoff=0.001)
+    texts = scheduler.run_all(range(6))
+    assert texts[3] == ""
+    assert texts[:3] + texts[4:] == ["chunk 0", "chunk 1", "chunk 2", "chunk 4", "chunk 5"]
+    assert scheduler.stats.failed == 1
+    assert scheduler.stats.retries == 2
+
+
+def test_non_transient_error_does_not_abort_the_transcription():
+    def recognize(chunk):
+        if chunk == 2:
+            raise ValueError("corrupt audio")
+        return f"chunk {chunk}"
+
+    scheduler = RecognitionScheduler(recognize, backend="local", concurrency=3, backoff=0.001)
+    texts = scheduler.run_all(range(5))
+    assert texts == ["chunk 0", "chunk 1", "", "chunk 3", "chunk 4"]
+    assert scheduler.stats.failed == 1
+    assert scheduler.stats.retries == 0
+    assert scheduler.stats.last_error == "ValueError: corrupt audio"
+
+
+def test_chunk_past_its_deadline_is_given_up():
+    release = threading.Event()
+
+    def recognize(chunk):
+        if chunk == 1:
+            release.wait(5)  # hangs well past the deadline
+        return f"chunk {chunk}"
+
+    scheduler = RecognitionScheduler(recognize, backend="local", concurrency=4, max_retries=0, timeout=0.2)
+    start = time.perf_counter()
+    try:
+        texts = scheduler.run_all(range(4))
+    finally:
+        release.set()
+    assert time.perf_counter() - start < 2
+    assert texts == ["chunk 0", "", "chunk 2", "chunk 3"]
+    assert scheduler.stats.timeouts == 1
@@ -0,0 +1,55 @@
+import numpy as np
+import pydub.silence
+import pytest
+from pydub import AudioSegment
+
+import silence
+
+
+# Function to build speech-like bursts separated by pauses (16-bit mono)
+def bursts_and_pauses(seconds=20, sample_rate=16000, seed=0):
+    rng = np.random.default_rng(seed)
+    total = seconds * sample_rate
+    samples = np.empty(total, dtype=np.int16)
+    position = 0
+    while position < total:
+        for level, low, high in ((3000, 0.5, 3.0), (20, 0.2, 1.5)):
+            end = min(position + int(rng.uniform(low, high) * sample_rate), total)
+            samples[position:end] = rng.normal(0, level, end - position).astype(np.int16)
+            position = end
+    return AudioSegment(data=samples.tobytes(), sample_width=2, frame_rate=sample_rate, channels=1)
+
+
+@pytest.fixture(scope="module")
+def sound():
+    return bursts_and_pauses()
+
+
+@pytest.mark.parametrize("min_silence_len, seek_step", [(500, 1), (300, 1), (1000, 10)])
+def test_detect_silence_matches_pydub(sound, min_silence_len, seek_step):
+    thresh = sound.dBFS - 14
+    assert silence.detect_silence(sound, min_silence_len, thresh, seek_step) == \
+        pydub.silence.detect_silence(sound, min_silence_len, thresh, seek_step)
+
+
+@pytest.mark.parametrize("min_silence_len, seek_step", [(500, 1), (1000, 10)])
+def test_detect_nonsilent_matches_pydub(sound, min_silence_len, seek_step):
+    thresh = sound.dBFS - 14
+    assert silence.detect_nonsilent(sound, min_silence_len, thresh, seek_step) == \
+        pydub.silence.detect_nonsilent(sound, min_silence_len, thresh, seek_step)
+
+
+@pytest.mark.parametrize("keep_silence", [0, 200, 500, True, False])
+def test_split_on_silence_matches_pydub(sound, keep_silence):
+    params = dict(min_silence_len=500, silence_thresh=sound.dBFS - 14, keep_silence=keep_silence)
+    chunks = silence.split_on_silence(sound, **params)
+    reference = pydub.silence.split_on_silence(sound, **params)
+    assert len(chunks) == len(reference)
+    assert [chunk.raw_data for chunk in chunks] == [chunk.raw_data for chunk in reference]
+
+
+def test_all_silent_and_empty_audio(sound):
+    quiet = AudioSegment.silent(duration=2000, frame_rate=16000)
+    assert silence.detect_nonsilent(quiet, 500, -50) == pydub.silence.detect_nonsilent(quiet, 500, -50)
+    empty = sound[:0]
+    assert silence.detect_silence(empty, 500, -50) == pydub.silence.detect_silence(empty, 500, -50)
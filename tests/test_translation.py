@@ -0,0 +1,98 @@
+import pytest
+
+from cache import ResultCache
+from translation import LocalBackend, TranslationEngine, split_sentences
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "cache.sqlite3"))
+
+
+# Function to create an engine on the local backend that never detects languages itself
+def local_engine(cache, backend=None, **kwargs):
+    return TranslationEngine(backend=backend or LocalBackend(), cache=cache, detect=lambda text: "en", **kwargs)
+
+
+def test_split_sentences_keeps_separators():
+    sentences, separators = split_sentences("One. Two?\nThree")
+    assert sentences == ["One.", "Two?", "Three"]
+    assert separators == [" ", "\n", ""]
+
+
+def test_repeated_sentences_are_translated_once(cache):
+    engine = local_engine(cache)
+    text = "Hello there. How are you? Hello there. How are you?"
+    assert engine.translate(text, "fr") == ("[fr] Hello there. [fr] How are you? "
+                                            "[fr] Hello there. [fr] How are you?")
+    assert engine.backend.requests == 1
+    assert engine.backend.sentences == 2
+
+
+def test_layout_is_kept(cache):
+    engine = local_engine(cache)
+    text = "First line. Same line!\nSecond line.\nThird line"
+    assert engine.translate(text, "de") == "[de] First line. [de] Same line!\n[de] Second line.\n[de] Third line"
+
+
+def test_lru_and_persistent_cache_hits(cache):
+    engine = local_engine(cache)
+    engine.translate("Good morning. Good night.", "es")
+    engine.translate("Good morning. Good night.", "es")
+    assert engine.backend.requests == 1  # Second call served by the LRU
+
+    fresh = local_engine(cache)
+    assert fresh.translate("Good night. Good evening.", "es") == "[es] Good night. [es] Good evening."
+    assert fresh.backend.requests == 1
+    assert fresh.backend.sentences == 1  # Only "Good evening." missed the persistent cache
+
+
+def test_lru_is_bounded(cache):
+    engine = local_engine(cache, lru_size=2)
+    engine.translate("A. B. C.", "fr")
+    assert len(engine._lru) == 2
+
+
+def test_translate_many_languages(cache):
+    engine = local_engine(cache)
+    results = engine.translate_many("Hello. Goodbye.", ["French", "de", "hindi"])
+    assert results == {"French": "[fr] Hello. [fr] Goodbye.", "de": "[de] Hello. [de] Goodbye.",
+                       "hindi": "[hi] Hello. [hi] Goodbye."}
+    # One batch per language
+    assert engine.backend.requests == 3
+
+
+def test_target_equal_to_source_is_not_translated(cache):
+    engine = local_engine(cache)
+    assert engine.translate("Hello. Goodbye.", "English") == "Hello. Goodbye."
+    assert engine.translate("Bonjour.", "fr", src="French") == "Bonjour."
+    assert engine.backend.requests == 0
+
+
+def test_batches_are_bounded(cache):
+    engine = local_engine(cache, max_batch_chars=30)
+    text = " ".join(f"Sentence number {i}." for i in range(6))
+    engine.translate(text, "fr")
+    assert engine.backend.requests == 6
+    assert engine.backend.sentences == 6
+
+
+# Backend failing a set number of times before it answers
+class FlakyBackend(LocalBackend):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def translate_batch(self, texts, src, dest):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("unreachable")
+        return super().translate_batch(texts, src, dest)
+
+
+def test_failed_batches_are_retried(cache):
+    engine = local_engine(cache, backend=FlakyBackend(failures=2), backoff=0)
+    assert engine.translate("Hello.", "fr") == "[fr] Hello."
+    engine = local_engine(cache, backend=FlakyBackend(failures=5), retries=1, backoff=0)
+    with pytest.raises(ConnectionError):
+        engine.translate("Goodbye.", "fr")
@@ -0,0 +1,127 @@
+import os
+from dotenv import load_dotenv
+import google.generativeai as genai
+import googleapiclient.discovery
+from cache import get_cache, make_key, media_digest, video_id_from_url
+from gemini_client import DEFAULT_MODEL, get_summary_client
+from transcripts import PREFERRED_LANGUAGES, TranscriptSegments, fetch_best_transcript
+from translation import get_translation_engine
+from language_detection import detect_language as identify_language
+from profiler import instrument
+
+load_dotenv()  # Load environment variables
+
+# Configure API keys
+genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+youtube_api_key = os.getenv("YOUTUBE_API_KEY")
+
+prompt = """You are a YouTube video summarizer. You will take the transcript text
+and summarize the entire video, providing the important points in a concise format. """
+
+# Function to detect language of text, from a sample of it or the transcript track's language code
+def detect_language(text, known_code=None):
+    return identify_language(text, known_code)
+
+# Function to translate summary to target language
+def translate_summary(summary, target_lang):
+    return get_translation_engine().translate(summary, target_lang)
+
+# Function to translate summary to several target languages in one pass; returns {language: text}
+def translate_summary_many(summary, target_langs):
+    return get_translation_engine().translate_many(summary, target_langs)
+
+# Function to fetch the best transcript track of a YouTube video (manual over generated,
+# then preferred language) as timestamped segments
+def fetch_transcript_segments(youtube_video_url, languages=PREFERRED_LANGUAGES):
+    video_id = video_id_from_url(youtube_video_url)
+    return fetch_best_transcript(video_id, languages), video_id
+
+# Function to generate summary using Gemini Pro, in a single request sized from the transcript
+def generate_summary(transcript_text, prompt, summary_percentage):
+    return get_summary_client().summarize(transcript_text, prompt, summary_percentage)
+
+
+# Function to get video details using YouTube Data API
+@instrument("youtube_api")
+def fetch_video_details(video_id):
+    youtube = googleapiclient.discovery.build("youtube", "v3", developerKey=youtube_api_key)
+    request = youtube.videos().list(part="snippet", id=video_id)
+    response = request.execute()
+
+    if response["items"]:
+        title = response["items"][0]["snippet"]["title"]
+        description = response["items"][0]["snippet"]["description"]
+        return title, description
+    else:
+        return None, None
+
+# Function to fetch the transcript segments, reusing cached ones for the same video
+def cached_transcript_segments(youtube_video_url, languages=PREFERRED_LANGUAGES):
+    video_id = video_id_from_url(youtube_video_url)
+    key = make_key(video_id, "transcript", source="youtube_transcript_api", track="best",
+                   languages=list(languages))
+    data = get_cache().get(key) if video_id else None
+    if data is not None:
+        return TranscriptSegments.from_dict(data), video_id
+    segments, video_id = fetch_transcript_segments(youtube_video_url, languages)
+    if segments:
+        get_cache().set(key, segments.to_dict())
+    return segments, video_id
+
+# Function to extract the transcript text, reusing a cached copy for the same video
+def cached_transcript_details(youtube_video_url):
+    segments, video_id = cached_transcript_segments(youtube_video_url)
+    return (segments.text() if segments else ""), video_id
+
+# Function to build the cache key of a video's summary; the transcript digest makes a
+# changed transcript (e.g. a better track found later) get a new summary, and the client's
+# backend keeps stub summaries apart from Gemini ones
+def summary_key(video_id, transcript_text, prompt, summary_percentage):
+    return make_key(video_id, "summary", model=DEFAULT_MODEL, backend=get_summary_client().backend,
+                    strategy="single-pass", prompt=prompt,
+                    summary_percentage=summary_percentage,
+                    transcript=media_digest(transcript_text.encode("utf-8")))
+
+# Function to generate a summary, reusing a cached one for the same transcript and settings
+def cached_summary(video_id, transcript_text, prompt, summary_percentage):
+    return get_cache().get_or_compute(summary_key(video_id, transcript_text, prompt, summary_percentage),
+                                      lambda: generate_summary(transcript_text, prompt, summary_percentage))
+
+# Function to stream a summary as it is generated (for st.write_stream), or yield the cached one
+def stream_summary(video_id, transcript_text, prompt, summary_percentage):
+    return get_cache().get_or_stream(
+        summary_key(video_id, transcript_text, prompt, summary_percentage),
+        lambda: get_summary_client().stream_summary(transcript_text, prompt, summary_percentage))
+
+# Function to translate a summary; the engine reuses cached translations sentence by sentence
+def cached_translation(summary, target_lang):
+    return translate_summary(summary, target_lang)
+
+# Function to get video details, reusing cached ones for the same video
+def cached_video_details(video_id):
+    key = make_key(video_id, "details", api="youtube/v3")
+    details = get_cache().get(key)
+    if details is None:
+        details = fetch_video_details(video_id)
+        if details[0] is not None:
+            get_cache().set(key, list(details))
+    return tuple(details)
+
+# Function to run a whole summary job (transcript -> summary -> translation) outside of Streamlit.
+# payload: {"url": ..., "summary_percentage": ..., "target_language": ...}
+def run_summary_job(payload, progress=None):
+    progress = progress or (lambda stage, fraction: None)
+    progress("transcript", 0.1)
+    transcript_text, video_id = cached_transcript_details(payload["url"])
+    if not transcript_text:
+        raise RuntimeError("No transcription details found for the provided link.")
+    progress("details", 0.2)
+    video_title, _ = cached_video_details(video_id)
+    progress("summarize", 0.4)
+    summary = cached_summary(video_id, transcript_text, prompt, payload["summary_percentage"])
+    target_language = payload.get("target_language", "English")
+    if target_language.lower() not in ("english", "en"):
+        progress("translate", 0.8)
+        summary = cached_translation(summary, target_language.lower())
+    progress("done", 1.0)
+    return {"video_id": video_id, "video_title": video_title, "summary": summary}
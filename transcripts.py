@@ -0,0 +1,113 @@
+import os
+from array import array
+from youtube_transcript_api import YouTubeTranscriptApi, CouldNotRetrieveTranscript
+from profiler import instrument
+
+# Languages to prefer when choosing a transcript track, best first (comma-separated codes)
+PREFERRED_LANGUAGES = tuple(code.strip() for code in os.getenv("TRANSCRIPT_LANGUAGES", "en").split(",") if code.strip())
+
+
+# Timestamped segments of one transcript track. Start times and durations are kept in
+# float arrays and the texts in a single string with an offset array, instead of a list
+# of dicts per segment.
+class TranscriptSegments:
+    def __init__(self, language_code="", is_generated=False):
+        self.language_code = language_code
+        self.is_generated = is_generated
+        self.starts = array("d")
+        self.durations = array("d")
+        self.offsets = array("L", [0])
+        self._texts = []
+        self._joined = ""
+
+    # Build from the segments returned by youtube_transcript_api (dicts or snippet objects)
+    @classmethod
+    def from_fetched(cls, fetched, language_code="", is_generated=False):
+        segments = cls(language_code, is_generated)
+        for segment in fetched:
+            if isinstance(segment, dict):
+                segments.append(segment["start"], segment.get("duration", 0.0), segment["text"])
+            else:
+                segments.append(segment.start, segment.duration, segment.text)
+        return segments
+
+    # Build from the dict written by to_dict (e.g. read back from the result cache)
+    @classmethod
+    def from_dict(cls, data):
+        segments = cls(data["language_code"], data["is_generated"])
+        for start, duration, text in zip(data["starts"], data["durations"], data["texts"]):
+            segments.append(start, duration, text)
+        return segments
+
+    def to_dict(self):
+        return {
+            "language_code": self.language_code,
+            "is_generated": self.is_generated,
+            "starts": self.starts.tolist(),
+            "durations": self.durations.tolist(),
+            "texts": [self[i][2] for i in range(len(self))],
+        }
+
+    def append(self, start, duration, text):
+        # Segment texts may contain line breaks; one segment per line keeps boundaries visible
+        text = " ".join(text.split())
+        self.starts.append(start)
+        self.durations.append(duration)
+        self._texts.append(text)
+        self.offsets.append(self.offsets[-1] + len(text))
+
+    def _buffer(self):
+        if self._texts:
+            self._joined += "".join(self._texts)
+            self._texts = []
+        return self._joined
+
+    def __len__(self):
+        return len(self.starts)
+
+    # Return segment i as (start, duration, text)
+    def __getitem__(self, i):
+        buffer = self._buffer()
+        return self.starts[i], self.durations[i], buffer[self.offsets[i]:self.offsets[i + 1]]
+
+    # Full text, one segment per line
+    def text(self):
+        buffer = self._buffer()
+        return "".join(buffer[self.offsets[i]:self.offsets[i + 1]] + "\n" for i in range(len(self)))
+
+
+# Function to list the transcript tracks of a video (youtube_transcript_api before and after 1.0)
+def list_tracks(video_id):
+    if hasattr(YouTubeTranscriptApi, "list_transcripts"):
+        return list(YouTubeTranscriptApi.list_transcripts(video_id))
+    return list(YouTubeTranscriptApi().list(video_id))
+
+
+# Function to rank transcript tracks: manually created before generated ones, then by
+# position in the preferred languages, then in the order YouTube lists them
+def rank_tracks(tracks, languages=PREFERRED_LANGUAGES):
+    def rank(indexed):
+        position, track = indexed
+        language = languages.index(track.language_code) if track.language_code in languages else len(languages)
+        return track.is_generated, language, position
+    return [track for _, track in sorted(enumerate(tracks), key=rank)]
+
+
+# Function to download one track as TranscriptSegments
+def fetch_track(track):
+    return TranscriptSegments.from_fetched(track.fetch(), track.language_code, track.is_generated)
+
+
+# Function to fetch only the best ranked track of a video; the next candidates are tried,
+# one at a time, only when a download fails. Returns None when no track can be fetched.
+@instrument("youtube_transcript", measure=lambda segments, *args, **kwargs:
+            {"audio_seconds": segments.starts[-1] + segments.durations[-1]} if segments else {})
+def fetch_best_transcript(video_id, languages=PREFERRED_LANGUAGES):
+    for track in rank_tracks(list_tracks(video_id), languages):
+        try:
+            segments = fetch_track(track)
+        except CouldNotRetrieveTranscript:
+            continue
+        if len(segments):
+            return segments
+    return None
@@ -0,0 +1,210 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from cache import get_cache, make_key, media_digest
+from language_detection import detect_language
+from profiler import span
+
+# Codes of the languages offered in the apps' selectboxes
+LANGUAGE_CODES = {
+    "english": "en",
+    "french": "fr",
+    "german": "de",
+    "spanish": "es",
+    "telugu": "te",
+    "hindi": "hi",
+    "malayalam": "ml",
+    "tamil": "ta",
+    "kannada": "kn",
+}
+# Google Translate rejects requests above 5000 characters; stay below with some margin
+MAX_BATCH_CHARS = 4500
+LRU_SIZE = 4096
+
+# Sentence ends: ., !, ? and the Devanagari danda, followed by whitespace
+SENTENCE_END = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+
+# Function to turn a language name ("French") or code ("fr") into a language code
+def language_code(language):
+    language = language.strip().lower()
+    return LANGUAGE_CODES.get(language, language)
+
+
+# Function to split a text into sentences; returns the sentences and the separators that
+# followed them, so the translation can be put back together with the same layout
+def split_sentences(text):
+    sentences = []
+    separators = []
+    position = 0
+    for match in SENTENCE_END.finditer(text):
+        sentences.append(text[position:match.start()])
+        separators.append("\n" if "\n" in match.group() else " ")
+        position = match.end()
+    sentences.append(text[position:])
+    separators.append("")
+    return sentences, separators
+
+
+# Function to group texts into batches of at most max_chars characters (joined by newlines)
+def make_batches(texts, max_chars=MAX_BATCH_CHARS):
+    batches = []
+    current = []
+    current_chars = 0
+    for text in texts:
+        if current and current_chars + len(text) + 1 > max_chars:
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(text)
+        current_chars += len(text) + 1
+    if current:
+        batches.append(current)
+    return batches
+
+
+# Backend using googletrans: a batch is sent as one request, one sentence per line
+class GoogletransBackend:
+    def __init__(self):
+        from googletrans import Translator
+        self.translator = Translator()
+
+    def translate_batch(self, texts, src, dest):
+        translated = self.translator.translate("\n".join(texts), src=src, dest=dest).text.split("\n")
+        if len(translated) != len(texts):
+            # The service merged or split lines; translate the sentences one by one instead
+            return [result.text for result in self.translator.translate(texts, src=src, dest=dest)]
+        return translated
+
+
+# Local backend for tests and benchmarks: tags each sentence with the target language and
+# counts the requests it receives
+class LocalBackend:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self.sentences = 0
+
+    def translate_batch(self, texts, src, dest):
+        self.requests += 1
+        self.sentences += len(texts)
+        time.sleep(self.latency)
+        return [f"[{dest}] {text}" for text in texts]
+
+
+# Translation engine: splits texts into sentences, reuses translated sentences from an
+# in-memory LRU and the persistent result cache, keyed by (sentence, src, dest), and sends
+# only the missing ones to the backend in size-bounded batches, with retries
+class TranslationEngine:
+    def __init__(self, backend=None, cache=None, lru_size=LRU_SIZE, max_batch_chars=MAX_BATCH_CHARS,
+                 retries=3, backoff=0.5, detect=None):
+        self._backend = backend
+        self.cache = cache
+        self.lru_size = lru_size
+        self.max_batch_chars = max_batch_chars
+        self.retries = retries
+        self.backoff = backoff
+        self.detect = detect
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = GoogletransBackend()
+        return self._backend
+
+    def _cache(self):
+        return self.cache if self.cache is not None else get_cache()
+
+    def _detect(self, text):
+        if self.detect is not None:
+            return self.detect(text)
+        return detect_language(text)
+
+    @staticmethod
+    def _key(sentence, src, dest):
+        return make_key(media_digest(sentence.encode("utf-8")), "sentence-translation", src=src, dest=dest)
+
+    def _lookup(self, sentence, src, dest):
+        lru_key = (sentence, src, dest)
+        with self._lock:
+            if lru_key in self._lru:
+                self._lru.move_to_end(lru_key)
+                return self._lru[lru_key]
+        translated = self._cache().get(self._key(sentence, src, dest))
+        if translated is not None:
+            self._remember(sentence, src, dest, translated)
+        return translated
+
+    def _remember(self, sentence, src, dest, translated):
+        with self._lock:
+            self._lru[(sentence, src, dest)] = translated
+            self._lru.move_to_end((sentence, src, dest))
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _translate_batch(self, batch, src, dest):
+        for attempt in range(self.retries + 1):
+            try:
+                with span("translate.batch", bytes=sum(len(text.encode("utf-8")) for text in batch)):
+                    return self.backend.translate_batch(batch, src, dest)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    # Translate the given distinct sentences, returning {sentence: translation}
+    def translate_sentences(self, sentences, src, dest):
+        translations = {}
+        missing = []
+        for sentence in sentences:
+            translated = self._lookup(sentence, src, dest)
+            if translated is None:
+                missing.append(sentence)
+            else:
+                translations[sentence] = translated
+        for batch in make_batches(missing, self.max_batch_chars):
+            translated_batch = list(zip(batch, self._translate_batch(batch, src, dest)))
+            for sentence, translated in translated_batch:
+                translations[sentence] = translated
+                self._remember(sentence, src, dest, translated)
+            # One cache transaction per batch, not one connection per sentence
+            self._cache().set_many((self._key(sentence, src, dest), translated)
+                                   for sentence, translated in translated_batch)
+        return translations
+
+    # Translate a text into several languages in one pass: the text is split and its
+    # language detected once, and every distinct sentence is translated once per language.
+    # Returns {dest: translated text}.
+    def translate_many(self, text, dests, src=None):
+        src = language_code(src) if src else self._detect(text)
+        sentences, separators = split_sentences(text)
+        distinct = list(dict.fromkeys(sentence.strip() for sentence in sentences if sentence.strip()))
+        results = {}
+        for dest in dests:
+            code = language_code(dest)
+            if code == src:
+                results[dest] = text
+                continue
+            translations = self.translate_sentences(distinct, src, code)
+            results[dest] = "".join(
+                (translations.get(sentence.strip(), sentence) if sentence.strip() else sentence) + separator
+                for sentence, separator in zip(sentences, separators))
+        return results
+
+    def translate(self, text, dest, src=None):
+        return self.translate_many(text, [dest], src)[dest]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+# Function to get the process-wide translation engine
+def get_translation_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TranslationEngine()
+        return _engine
@@ -0,0 +1,127 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import numpy as np
+import torch
+import whisper
+from pydub import AudioSegment
+from silence import detect_nonsilent
+from models import registry
+from profiler import span
+
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+WINDOW_SECONDS = whisper.audio.CHUNK_LENGTH  # Whisper always decodes 30-second windows
+
+# Selectable model tiers, fastest first
+MODEL_TIERS = {
+    "fast": "tiny",
+    "balanced": "base",
+    "accurate": "small",
+}
+
+
+# Function to find speech segments (start, end) in seconds with the vectorized silence detector.
+# Segments longer than one Whisper window are cut into window-sized pieces.
+def speech_segments(samples, min_silence_len=500, silence_offset=-14, keep_silence=200,
+                    window_seconds=WINDOW_SECONDS):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    sound = AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=SAMPLE_RATE, channels=1)
+    if not len(sound):
+        return []
+    ranges = detect_nonsilent(sound, min_silence_len=min_silence_len, silence_thresh=sound.dBFS + silence_offset)
+
+    segments = []
+    total = len(samples) / SAMPLE_RATE
+    for start_ms, end_ms in ranges:
+        start = max(0.0, (start_ms - keep_silence) / 1000)
+        end = min(total, (end_ms + keep_silence) / 1000)
+        while end - start > window_seconds:
+            segments.append((start, start + window_seconds))
+            start += window_seconds
+        segments.append((start, end))
+    return segments
+
+
+# Function to pack consecutive speech segments into windows of at most 30 seconds of audio,
+# so every decoder pass is full of speech instead of padding and silence
+def pack_windows(segments, window_seconds=WINDOW_SECONDS):
+    windows = []
+    current = []
+    current_length = 0.0
+    for start, end in segments:
+        length = end - start
+        if current and current_length + length > window_seconds:
+            windows.append(current)
+            current, current_length = [], 0.0
+        current.append((start, end))
+        current_length += length
+    if current:
+        windows.append(current)
+    return windows
+
+
+# Function to cut the samples of a packed window out of the full recording
+def window_samples(samples, window):
+    pieces = [samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] for start, end in window]
+    return np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+
+
+# Function to compute the log-mel spectrograms of a batch of windows on CPU threads
+def batch_log_mel(model, batch_samples, executor):
+    def log_mel(samples):
+        audio = whisper.pad_or_trim(torch.from_numpy(samples))
+        return whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels)
+    return torch.stack(list(executor.map(log_mel, batch_samples))).to(model.device)
+
+
+# Context manager setting torch's intra-op thread count and restoring the previous one, so
+# other models in the process (DistilBART) keep their own setting
+@contextmanager
+def torch_threads(threads):
+    previous = torch.get_num_threads()
+    torch.set_num_threads(threads)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+
+# Function to transcribe a media file with Whisper: silence-based segmentation, segments
+# packed into 30-second windows, log-mel computed on a thread pool and windows decoded in
+# batches. `path` may also be a float32 array of 16 kHz mono samples. Yields the non-empty
+# windows as {"start", "end", "text", "pieces"} as soon as their batch is decoded. A window
+# packs several speech segments that need not be contiguous, so start/end are coarse (from
+# the first piece's start to the last piece's end); "pieces" lists each segment's
+# (start, end) in seconds. The text is not aligned to the individual pieces.
+def iter_transcribe_batched(path, model_size="base", batch_size=8, threads=None, language=None):
+    model = registry.get(f"whisper-{model_size}")
+    threads = threads or os.cpu_count() or 1
+
+    with span("whisper.load_audio"):
+        samples = whisper.load_audio(path) if isinstance(path, str) else path
+    audio_seconds = len(samples) / SAMPLE_RATE
+    with span("split_on_silence", bytes=samples.nbytes, audio_seconds=audio_seconds):
+        windows = pack_windows(speech_segments(samples))
+    options = whisper.DecodingOptions(language=language, without_timestamps=True,
+                                      fp16=model.device.type == "cuda")
+
+    with span("whisper.decode", audio_seconds=audio_seconds), ThreadPoolExecutor(max_workers=threads) as executor:
+        for first in range(0, len(windows), batch_size):
+            batch = windows[first:first + batch_size]
+            # The thread count is restored before every yield, not only at the end
+            with torch_threads(threads):
+                mels = batch_log_mel(model, [window_samples(samples, window) for window in batch], executor)
+                with torch.no_grad():
+                    results = whisper.decode(model, mels, options)
+            for window, result in zip(batch, results):
+                text = result.text.strip()
+                if text:
+                    yield {"start": window[0][0], "end": window[-1][1], "text": text,
+                           "pieces": [(start, end) for start, end in window]}
+
+
+# Function to transcribe a media file with Whisper in one go. Returns the text and the
+# windows' text with their start/end timestamps.
+def transcribe_batched(path, model_size="base", batch_size=8, threads=None, language=None):
+    segments = list(iter_transcribe_batched(path, model_size, batch_size, threads, language))
+    return {"text": " ".join(segment["text"] for segment in segments), "segments": segments}
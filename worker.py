@@ -0,0 +1,78 @@
+# Background worker pool for the jobs queued by app.py and project.py.
+#
+#   python worker.py --workers 4
+#
+# Each worker is a separate process that claims jobs from the SQLite queue (jobs.py),
+# runs the pipeline and stores the result, so long videos neither block a Streamlit
+# session nor get lost when the browser is refreshed.
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+import traceback
+from jobs import JobQueue
+from profiler import trace
+
+
+# Function to run one job; pipelines are imported lazily so a worker only loads what it needs
+def run_job(kind, payload, progress):
+    if kind == "video":
+        from audio_pipeline import run_video_job
+        return run_video_job(payload, progress)
+    if kind == "youtube_summary":
+        from transcript_pipeline import run_summary_job
+        return run_summary_job(payload, progress)
+    raise ValueError(f"Unknown job kind '{kind}'")
+
+
+# Function that claims and runs jobs until the process is stopped
+def worker_loop(worker_name, poll_interval=1.0):
+    queue = JobQueue()
+    while True:
+        job = queue.claim(worker_name)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+
+        def progress(stage, fraction, job_id=job["id"]):
+            queue.update_progress(job_id, worker_name, stage, fraction)
+
+        try:
+            with trace(job["kind"]):
+                result = run_job(job["kind"], job["payload"], progress)
+            stored = queue.complete(job["id"], worker_name, result)
+        except Exception as e:
+            traceback.print_exc()
+            stored = queue.fail(job["id"], worker_name, f"{type(e).__name__}: {e}")
+        if not stored:
+            print(f"Job {job['id']} was handed to another worker; result dropped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background workers for queued summary jobs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: one per CPU core)")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="seconds to wait before checking an empty queue again")
+    args = parser.parse_args()
+
+    host = socket.gethostname()
+    processes = [
+        multiprocessing.Process(target=worker_loop, args=(f"{host}-{os.getpid()}-{i}", args.poll_interval),
+                                daemon=True)
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    print(f"Started {len(processes)} workers, queue: {JobQueue().path}")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
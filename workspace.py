@@ -0,0 +1,122 @@
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import weakref
+from pydub import AudioSegment
+
+# Scratch root override, e.g. a dedicated tmpfs mount
+SCRATCH_ROOT = os.getenv("VIDEO_SUMMARY_SCRATCH_DIR")
+# Default disk quota of one workspace (in MB), override with VIDEO_SUMMARY_SCRATCH_QUOTA_MB
+DEFAULT_QUOTA_MB = int(os.getenv("VIDEO_SUMMARY_SCRATCH_QUOTA_MB", "2048"))
+TMPFS_DIR = "/dev/shm"
+
+
+# Raised when a workspace holds more data than its quota allows
+class QuotaExceededError(Exception):
+    pass
+
+
+# Function to choose where workspaces are created: the configured root, tmpfs when it
+# exists and has room for a full workspace, or the system temp directory
+def scratch_root(quota_bytes=DEFAULT_QUOTA_MB * 1024 * 1024):
+    if SCRATCH_ROOT:
+        os.makedirs(SCRATCH_ROOT, exist_ok=True)
+        return SCRATCH_ROOT
+    if os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK):
+        if shutil.disk_usage(TMPFS_DIR).free >= quota_bytes:
+            return TMPFS_DIR
+    return tempfile.gettempdir()
+
+
+# Per-request scratch directory with a unique name, a disk quota and guaranteed cleanup.
+# Use it as a context manager; the directory is also removed when the object is garbage
+# collected or the interpreter exits, so an exception or a killed rerun cannot leak it.
+class Workspace:
+    def __init__(self, prefix="video-summary-", quota_mb=DEFAULT_QUOTA_MB, root=None):
+        self.quota_bytes = quota_mb * 1024 * 1024
+        self.root = root or scratch_root(self.quota_bytes)
+        self.path = tempfile.mkdtemp(prefix=prefix, dir=self.root)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+    # Return the path of a file (or subdirectory) inside the workspace
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    # Create and return a subdirectory of the workspace
+    def directory(self, name):
+        path = self.file(name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    # Total size of the files in the workspace, in bytes
+    def usage(self):
+        total = 0
+        for directory, _, files in os.walk(self.path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(directory, name))
+                except OSError:
+                    pass
+        return total
+
+    # Raise QuotaExceededError if the workspace (plus `extra` bytes about to be written) is over quota
+    def check_quota(self, extra=0):
+        used = self.usage() + extra
+        if used > self.quota_bytes:
+            raise QuotaExceededError(
+                f"Scratch workspace uses {used / 2**20:.0f} MB, quota is {self.quota_bytes / 2**20:.0f} MB")
+
+    def cleanup(self):
+        self._finalizer()
+
+
+# Function to find the format and the data chunk of a PCM WAV file
+def read_wav_layout(path):
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file")
+        layout = {}
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size)
+                _, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+                layout.update(channels=channels, sample_rate=sample_rate, sample_width=bits // 8)
+                if chunk_size % 2:
+                    f.read(1)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                available = os.path.getsize(path) - offset
+                # Streamed WAVs may carry a placeholder size; trust the file length then
+                size = chunk_size if 0 < chunk_size <= available else available
+                frame_width = layout["channels"] * layout["sample_width"]
+                layout.update(offset=offset, size=size - size % frame_width)
+                return layout
+            else:
+                f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+# Function to open the PCM of a WAV file as an AudioSegment backed by a memory map, so
+# the samples are paged in on demand instead of being copied into the Python heap
+def load_pcm_segment(path):
+    layout = read_wav_layout(path)
+    if layout["sample_width"] not in (2, 4):
+        # 8-bit WAV samples are unsigned and 24-bit ones need widening; let pydub convert them
+        return AudioSegment.from_wav(path)
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    data = memoryview(mapped)[layout["offset"]:layout["offset"] + layout["size"]]
+    return AudioSegment(data=data, sample_width=layout["sample_width"],
+                        frame_rate=layout["sample_rate"], channels=layout["channels"])